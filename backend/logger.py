@@ -1,8 +1,102 @@
 """
 Logger Module: Centralized logging configuration for the application
+
+Log records are handed to a queue by every logger and written to app.log
+by a single background QueueListener thread, so request handlers never
+block on file I/O or the handler lock. The file itself is written through
+a 64 KB buffer and flushed periodically instead of once per record.
 """
 
+import atexit
 import logging
+import os
+import logging.handlers
+import queue
+
+LOG_FILE = "app.log"
+# Records below this level are dropped before formatting (e.g. LOG_LEVEL=DEBUG)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+LOG_BUFFER_SIZE = 64 * 1024
+LOG_FLUSH_INTERVAL_SECONDS = 0.5
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that does not flush after every record.
+
+    Records accumulate in a write buffer and reach disk when the buffer
+    fills, when flush() is called (see LOG_FLUSH_INTERVAL_SECONDS) or on
+    shutdown. ERROR and above are flushed immediately so crash logs are
+    never lost.
+    """
+
+    def __init__(self, filename, mode="a", encoding=None, buffer_size=LOG_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        super().__init__(filename, mode=mode, encoding=encoding)
+
+    def _open(self):
+        return open(
+            self.baseFilename, self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors
+        )
+
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+# Format: timestamp - name - level - message
+_formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# File handler for logging to app.log (only used by the listener thread)
+_file_handler = BufferedFileHandler(LOG_FILE)
+_file_handler.setLevel(logging.DEBUG)
+_file_handler.setFormatter(_formatter)
+
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_listener = logging.handlers.QueueListener(
+    _log_queue, _file_handler, respect_handler_level=True
+)
+_listener_running = False
+
+
+def start_log_listener():
+    """Start the background thread that writes queued records (idempotent)."""
+    global _listener_running
+    if not _listener_running:
+        _listener.start()
+        _listener_running = True
+
+
+def stop_log_listener():
+    """Drain the queue and stop the background writer thread (idempotent)."""
+    global _listener_running
+    if _listener_running:
+        _listener.stop()
+        _listener_running = False
+    _file_handler.flush()
+
+
+def flush_logs():
+    """Write buffered log records to disk."""
+    _file_handler.flush()
+
+
+# Started at import so scripts that use the modules directly still log;
+# the FastAPI lifespan in main.py stops it cleanly on shutdown.
+start_log_listener()
+atexit.register(stop_log_listener)
 
 
 def setup_logger(name="Medical-Assistant"):
@@ -16,26 +110,15 @@ def setup_logger(name="Medical-Assistant"):
         logging.Logger: Configured logger instance
 
     Configuration:
-        - Level: DEBUG (logs all messages)
-        - Handler: FileHandler writing to app.log
+        - Level: LOG_LEVEL env var (default: WARNING)
+        - Handler: QueueHandler -> background QueueListener -> app.log
         - Format: timestamp - logger_name - level - message
     """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    # File handler for logging to app.log
-    ch = logging.FileHandler("app.log")
-    ch.setLevel(logging.DEBUG)
-
-    # Format: timestamp - name - level - message
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    ch.setFormatter(formatter)
+    logger.setLevel(LOG_LEVEL)
 
     # Avoid duplicate handlers if logger is reconfigured
     if not logger.hasHandlers():
-        logger.addHandler(ch)
+        logger.addHandler(_queue_handler)
 
     return logger
-
@@ -13,28 +13,80 @@ Architecture:
     - Groq for LLM inference
 """
 
+import asyncio
+import os
+from contextlib import asynccontextmanager, suppress
+from dotenv import load_dotenv
+
+# Load .env once, before any module reads its configuration at import time
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from middlewares.exception_handler import catch_exception_middleware
+from logger import (
+    LOG_FLUSH_INTERVAL_SECONDS,
+    flush_logs,
+    start_log_listener,
+    stop_log_listener,
+)
+from modules.clients import aclose_clients
+from modules.medical_api import aclose_client as aclose_medical_api_client
+from modules.session_store import aclose_redis_client
+from modules.load_vectorstore import shutdown_pdf_pool
+from middlewares.exception_handler import ExceptionMiddleware
 from routes.upload_pdf import router as upload_router
 from routes.ask_question import router as ask_router
 from routes.upload_prescription import router as upload_prescription_router
 from routes.ask_prescription import router as ask_prescription_router
 
+async def _flush_logs_periodically():
+    """Push buffered log records to app.log every LOG_FLUSH_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL_SECONDS)
+        flush_logs()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup / shutdown hooks."""
+    # Background thread that writes queued log records to app.log
+    start_log_listener()
+    log_flusher = asyncio.create_task(_flush_logs_periodically())
+    yield
+    log_flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await log_flusher
+    # Release pooled LLM / drug API connections
+    await aclose_clients()
+    await aclose_medical_api_client()
+    await aclose_redis_client()
+    # Stop the PDF parsing worker processes
+    shutdown_pdf_pool()
+    # Flush remaining log records before the process exits
+    stop_log_listener()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Medical Assistant API",
-    description="API for AI Medical Assistant Chatbot"
+    description="API for AI Medical Assistant Chatbot",
+    lifespan=lifespan
 )
 
 # ============================================================
 # CORS CONFIGURATION
 # ============================================================
-# Allow all origins for development
-# In production, restrict to specific frontend domains
+# Explicit origin list (comma-separated ALLOWED_ORIGINS env var);
+# defaults to the Vite dev server used by the frontend
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # List of allowed origins
+    allow_origins=ALLOWED_ORIGINS,  # List of allowed origins
     allow_credentials=True,  # Allow cookies/auth headers
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"]  # Allow all headers
@@ -45,7 +97,7 @@ app.add_middleware(
 # MIDDLEWARE
 # ============================================================
 # Global exception handler catches all unhandled errors
-app.middleware("http")(catch_exception_middleware)
+app.add_middleware(ExceptionMiddleware)
 
 # ============================================================
 # ROUTERS
@@ -1,38 +1,56 @@
 """
 Exception Handler Middleware: Global error handling for FastAPI
 Catches all unhandled exceptions and returns structured error responses
+
+Implemented as a pure ASGI middleware rather than @app.middleware("http")
+(BaseHTTPMiddleware), which wraps every request in extra tasks and
+buffers the response body.
 """
 
-from fastapi import Request
 from fastapi.responses import JSONResponse
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
-async def catch_exception_middleware(request: Request, call_next):
+class ExceptionMiddleware:
     """
     Middleware to catch and handle all unhandled exceptions.
 
-    Args:
-        request (Request): Incoming HTTP request
-        call_next: Next middleware or route handler
-
-    Returns:
-        Response: Either the normal response or error response
-
     Error response format:
         {
             "error": "Error message"
         }
 
-    Note: All exceptions are logged with full traceback
+    Note: All exceptions are logged with full traceback. If the response
+    has already started streaming, the exception is re-raised since a
+    500 response can no longer be sent.
     """
-    try:
-        return await call_next(request)
-    except Exception as exc:
-        logger.exception("UNHANDLED EXCEPTION")
-        return JSONResponse(
-            status_code=500,
-            content={"error": str(exc)}
-        )
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            logger.exception("UNHANDLED EXCEPTION")
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=500,
+                content={"error": str(exc)}
+            )
+            await response(scope, receive, send)
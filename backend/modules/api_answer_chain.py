@@ -1,21 +1,15 @@
-import os
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+import re
+import asyncio
+from typing import AsyncIterator
+import msgspec
 from langchain_core.prompts import ChatPromptTemplate
-from modules.medical_api import fetch_rxnorm_id, fetch_dailymed_summary
+from modules.clients import ANSWER_MAX_TOKENS, get_llm
+from modules.medical_api import ApiResult, fetch_rxnorm_id, fetch_dailymed_summary
 
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Shared, cached (deterministic) gpt-oss-120b with streaming enabled
+llm = get_llm(max_tokens=ANSWER_MAX_TOKENS, streaming=True)
 
-llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="openai/gpt-oss-120b",
-    temperature=0
-)
-
-prompt = ChatPromptTemplate.from_messages([
-    ("system",
-     """You are a medical assistant.
+SYSTEM_PROMPT = """You are a medical assistant.
 
 You must answer strictly based on:
 1. The patient's prescription data.
@@ -24,9 +18,17 @@ You must answer strictly based on:
 
 Do NOT invent facts.
 If data is missing, say so clearly.
-"""),
+"""
+
+prompt = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    # Static instructions first, then per-session data, then the question:
+    # repeat questions on the same prescription share the longest possible
+    # prompt prefix, which provider-side prompt caching can reuse.
     ("human",
-     """Prescription Data:
+     """Provide a medically grounded answer to the user question below.
+
+Prescription Data:
 {prescription_json}
 
 Drug API Data:
@@ -34,35 +36,115 @@ Drug API Data:
 
 User Question:
 {question}
+""")
+])
 
-Provide a medically grounded answer.
+
+# Several questions about the same prescription in one call: the expensive
+# prescription + API context is sent (and prefilled) once instead of per question
+batch_prompt = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    ("human",
+     """Provide a medically grounded answer to each numbered user question below.
+
+Answer every question, in order, each on its own block starting with
+"A<number>:" (A1:, A2:, ...). Do not repeat the questions.
+
+Prescription Data:
+{prescription_json}
+
+Drug API Data:
+{api_data}
+
+User Questions:
+{questions}
 """)
 ])
 
+_ANSWER_MARKER_RE = re.compile(r"^[ \t*#]*A(\d+)\s*[:.)][ \t*]*", re.MULTILINE)
+
 
-def generate_api_answer(prescription_json: dict, question: str):
-    medications = prescription_json.get("medications", [])
+async def _lookup_drug(name: str) -> ApiResult:
+    rxnorm_id, dailymed_info = await asyncio.gather(
+        fetch_rxnorm_id(name),
+        fetch_dailymed_summary(name)
+    )
+    return ApiResult(drug=name, rxnorm_id=rxnorm_id, dailymed_info=dailymed_info)
 
-    api_context = []
 
-    for med in medications:
-        name = med.get("name")
+async def _build_api_context(prescription_json: dict) -> list[ApiResult]:
+    medications = prescription_json.get("medications", []) or []
+    return list(await asyncio.gather(*(_lookup_drug(med.get("name") or "") for med in medications)))
 
-        rx_id = fetch_rxnorm_id(name)
-        dailymed_info = fetch_dailymed_summary(name)
 
-        api_context.append({
-            "drug": name,
-            "rxnorm_id": rx_id,
-            "dailymed_info": dailymed_info
-        })
+def _split_batch_answers(raw_output: str, count: int) -> list[str]:
+    """Split an "A1: ... A2: ..." response into one answer per question."""
+    answers = [""] * count
+    markers = list(_ANSWER_MARKER_RE.finditer(raw_output))
 
-    formatted_prompt = prompt.invoke({
-        "prescription_json": prescription_json,
-        "api_data": api_context,
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(raw_output)
+        index = int(marker.group(1)) - 1
+        if 0 <= index < count and not answers[index]:
+            answers[index] = raw_output[marker.end():end].strip()
+
+    return answers
+
+
+async def _format_answer_prompt(prescription_json: dict, question: str, api_context: list[ApiResult] = None):
+    # api_context is normally the api_results already computed by
+    # compute_confidence at upload time; only fetch when not provided
+    if api_context is None:
+        api_context = await _build_api_context(prescription_json)
+
+    return prompt.invoke({
+        # Compact JSON (ApiResult structs would otherwise render as their repr)
+        "prescription_json": msgspec.json.encode(prescription_json).decode(),
+        "api_data": msgspec.json.encode(api_context).decode(),
         "question": question
     })
 
-    response = llm.invoke(formatted_prompt)
+
+async def generate_api_answer(prescription_json: dict, question: str, api_context: list[ApiResult] = None):
+    formatted_prompt = await _format_answer_prompt(prescription_json, question, api_context)
+
+    response = await llm.ainvoke(formatted_prompt)
 
     return response.content
+
+
+async def stream_api_answer(prescription_json: dict, question: str, api_context: list[ApiResult] = None) -> AsyncIterator[str]:
+    """
+    Same as generate_api_answer, but yields the answer text as Groq
+    streams it, so the first tokens reach the client right away.
+    """
+    formatted_prompt = await _format_answer_prompt(prescription_json, question, api_context)
+
+    async for chunk in llm.astream(formatted_prompt):
+        if chunk.content:
+            yield chunk.content
+
+
+async def generate_api_answer_batch(prescription_json: dict, questions: list[str], api_context: list[ApiResult] = None) -> list[str]:
+    """
+    Answer several questions about one prescription with a single LLM call.
+
+    Returns:
+        list of answers aligned with ``questions`` ("" if the model skipped one)
+    """
+    if not questions:
+        return []
+
+    if api_context is None:
+        api_context = await _build_api_context(prescription_json)
+
+    formatted_prompt = batch_prompt.invoke({
+        "prescription_json": msgspec.json.encode(prescription_json).decode(),
+        "api_data": msgspec.json.encode(api_context).decode(),
+        "questions": "\n".join(f"Q{i}: {q}" for i, q in enumerate(questions, start=1))
+    })
+
+    # Token budget grows with the number of questions answered in one call
+    response = await llm.ainvoke(formatted_prompt, max_tokens=ANSWER_MAX_TOKENS * len(questions))
+
+    return _split_batch_answers(response.content, len(questions))
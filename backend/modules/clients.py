@@ -0,0 +1,81 @@
+"""
+Shared Clients
+
+One place to build the expensive, connection-holding clients used across
+modules. Each getter is memoized, so every module that asks for the same
+model gets the same ChatGroq instance, and all Groq calls share one pooled
+HTTP client instead of one per module.
+
+Environment variables are expected to be loaded by the entry point
+(load_dotenv() in main.py, or at the top of a test script).
+"""
+
+import os
+from functools import lru_cache
+
+import httpx
+from langchain_groq import ChatGroq
+from modules.llm_cache import llm_cache
+
+DEFAULT_LLM_MODEL = "openai/gpt-oss-120b"
+
+# Output token caps. gpt-oss spends part of the budget on reasoning tokens,
+# so these leave headroom above the length of a typical answer.
+ANSWER_MAX_TOKENS = 1024
+JSON_MAX_TOKENS = 2048
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+# HTTP/2: concurrent LLM calls multiplex over one TLS connection to the
+# Groq host instead of opening one connection per in-flight request
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Pooled sync HTTP client shared by every ChatGroq instance."""
+    return httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+
+@lru_cache(maxsize=1)
+def get_http_async_client() -> httpx.AsyncClient:
+    """Pooled async HTTP client shared by every ChatGroq instance."""
+    return httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+
+@lru_cache(maxsize=None)
+def get_llm(
+    model: str = DEFAULT_LLM_MODEL,
+    cache: bool = True,
+    max_tokens: int | None = None,
+    json_mode: bool = False,
+    streaming: bool = False
+) -> ChatGroq:
+    """
+    Return the shared deterministic (temperature=0) chat model for ``model``.
+
+    Args:
+        model: Groq model name
+        cache: serve repeat prompts from the in-memory LLM cache
+        max_tokens: cap on generated tokens (bounds tail latency)
+        json_mode: have Groq enforce a JSON object response
+        streaming: stream tokens from the API (see ``astream``)
+    """
+    return ChatGroq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        model=model,
+        temperature=0,
+        max_tokens=max_tokens,
+        streaming=streaming,
+        model_kwargs={"response_format": {"type": "json_object"}} if json_mode else {},
+        cache=llm_cache if cache else None,
+        http_client=get_http_client(),
+        http_async_client=get_http_async_client()
+    )
+
+
+async def aclose_clients():
+    """Close the pooled HTTP clients (called from the FastAPI lifespan)."""
+    if get_http_async_client.cache_info().currsize:
+        await get_http_async_client().aclose()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
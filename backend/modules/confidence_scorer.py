@@ -10,7 +10,8 @@ Overall confidence = min(stage_confidences)
 """
 
 import re
-from modules.medical_api import fetch_rxnorm_id, fetch_dailymed_summary
+import asyncio
+from modules.medical_api import ApiResult, fetch_rxnorm_id, fetch_dailymed_summary
 from logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -19,15 +20,18 @@ logger = setup_logger(__name__)
 # Common medical abbreviations
 # ==============================
 
-KNOWN_ABBREVIATIONS = {
+KNOWN_ABBREVIATIONS = frozenset({
     "mbc", "cad", "dm", "htn", "ckd", "copd", "chf", "dvt",
     "pe", "uti", "acs", "mi", "cva", "tia", "gerd", "ibs",
     "ra", "oa", "sle", "ms", "tb", "hiv", "aids", "bph",
     "afib", "pvd", "pad", "ards", "ild", "nsclc", "sclc",
     "aml", "all", "cml", "cll", "dlbcl", "nhl", "hl",
-}
+})
 
-CONFIDENCE_LEVELS = ["Low", "Medium", "High"]
+_TOKEN_RE = re.compile(r'[A-Za-z]+')
+
+CONFIDENCE_LEVELS = ("Low", "Medium", "High")
+_LEVEL_RANK = {level: rank for rank, level in enumerate(CONFIDENCE_LEVELS)}
 
 
 # ==============================
@@ -49,7 +53,7 @@ def _score_diagnosis(diagnosis: str | None) -> dict:
     text = diagnosis.strip()
 
     # Check if it's purely an abbreviation (all-caps, short, or known abbrev)
-    tokens = re.findall(r'[A-Za-z]+', text)
+    tokens = _TOKEN_RE.findall(text)
     is_abbreviation = (
         len(tokens) <= 2
         and all(t.isupper() or t.lower() in KNOWN_ABBREVIATIONS for t in tokens)
@@ -78,9 +82,18 @@ def _score_diagnosis(diagnosis: str | None) -> dict:
 # Medication Normalization Confidence
 # ==============================
 
-def _score_medications(medications: list[dict]) -> tuple[list[dict], list[dict]]:
+async def _lookup_medication(name: str) -> tuple:
+    """Fetch RxNorm ID and DailyMed summary for one drug concurrently."""
+    return await asyncio.gather(
+        fetch_rxnorm_id(name),
+        fetch_dailymed_summary(name)
+    )
+
+
+async def _score_medications(medications: list[dict]) -> tuple[list[dict], list[ApiResult]]:
     """
     Per-drug confidence based on RxNorm + DailyMed resolution.
+    All drugs are looked up concurrently (the work is network-bound).
 
     Returns:
         (medication_scores, api_results)
@@ -91,17 +104,20 @@ def _score_medications(medications: list[dict]) -> tuple[list[dict], list[dict]]
     scores = []
     api_results = []
 
-    for med in medications:
-        name = med.get("name", "")
+    # "name": null (unreadable drug) counts as an empty name, not a crash
+    names = [med.get("name") or "" for med in medications]
 
-        rx_id = fetch_rxnorm_id(name)
-        dailymed = fetch_dailymed_summary(name)
+    # Same drug listed twice (e.g. different doses) is only looked up once
+    unique_names = list({name.strip().lower(): name for name in names}.values())
+    lookups = await asyncio.gather(*(_lookup_medication(name) for name in unique_names))
+    lookup_by_name = {
+        name.strip().lower(): result for name, result in zip(unique_names, lookups)
+    }
 
-        api_results.append({
-            "drug": name,
-            "rxnorm_id": rx_id,
-            "dailymed_info": dailymed
-        })
+    for name in names:
+        rx_id, dailymed = lookup_by_name[name.strip().lower()]
+
+        api_results.append(ApiResult(drug=name, rxnorm_id=rx_id, dailymed_info=dailymed))
 
         if rx_id and dailymed:
             level = "High"
@@ -128,7 +144,7 @@ def _score_medications(medications: list[dict]) -> tuple[list[dict], list[dict]]
 # API Grounding Coverage
 # ==============================
 
-def _compute_grounding_coverage(api_results: list[dict]) -> float:
+def _compute_grounding_coverage(api_results: list[ApiResult]) -> float:
     """
     Percentage of medications successfully grounded in external APIs.
     A drug is "grounded" if at least RxNorm OR DailyMed returned data.
@@ -138,7 +154,7 @@ def _compute_grounding_coverage(api_results: list[dict]) -> float:
 
     grounded = sum(
         1 for r in api_results
-        if r.get("rxnorm_id") or r.get("dailymed_info")
+        if r.rxnorm_id or r.dailymed_info
     )
 
     return round((grounded / len(api_results)) * 100, 1)
@@ -149,7 +165,7 @@ def _compute_grounding_coverage(api_results: list[dict]) -> float:
 # ==============================
 
 def _level_to_rank(level: str) -> int:
-    return CONFIDENCE_LEVELS.index(level) if level in CONFIDENCE_LEVELS else 0
+    return _LEVEL_RANK.get(level, 0)
 
 
 def _rank_to_level(rank: int) -> str:
@@ -160,7 +176,7 @@ def _rank_to_level(rank: int) -> str:
 # Main Entry Point
 # ==============================
 
-def compute_confidence(prescription_data: dict) -> tuple[dict, list[dict]]:
+async def compute_confidence(prescription_data: dict) -> tuple[dict, list[ApiResult]]:
     """
     Compute confidence scores for all stages of the prescription pipeline.
 
@@ -177,7 +193,7 @@ def compute_confidence(prescription_data: dict) -> tuple[dict, list[dict]]:
 
     # 2. Medications
     medications = prescription_data.get("medications", []) or []
-    med_scores, api_results = _score_medications(medications)
+    med_scores, api_results = await _score_medications(medications)
 
     # 3. API grounding
     grounding_coverage = _compute_grounding_coverage(api_results)
@@ -200,6 +216,6 @@ def compute_confidence(prescription_data: dict) -> tuple[dict, list[dict]]:
         "overall_confidence": overall
     }
 
-    logger.info(f"[Confidence] Overall: {overall}, Grounding: {grounding_coverage}%")
+    logger.info("[Confidence] Overall: %s, Grounding: %s%%", overall, grounding_coverage)
 
     return confidence, api_results
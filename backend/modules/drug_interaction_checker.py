@@ -12,29 +12,29 @@ Since the RxNorm Interaction API was discontinued (Jan 2024), we use
 drug class overlap + LLM reasoning + OpenFDA adverse event signals.
 """
 
-import os
-import json
+import orjson
 from itertools import combinations
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from modules.medical_api import fetch_drug_classes, fetch_openfda_interactions
+from langchain_core.runnables import RunnableLambda, RunnableParallel
+from modules.clients import JSON_MAX_TOKENS, get_llm
+from modules.medical_api import (
+    fetch_drug_classes,
+    fetch_drug_classes_by_rxcui,
+    ApiResult,
+    fetch_openfda_interactions,
+)
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
 # ==============================
 # LLM for interaction analysis
 # ==============================
 
-llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="openai/gpt-oss-120b",
-    temperature=0
-)
+# Shared, cached (deterministic) gpt-oss-120b; Groq enforces a JSON response
+llm = get_llm(max_tokens=JSON_MAX_TOKENS, json_mode=True)
 
 interaction_prompt = ChatPromptTemplate.from_messages([
     ("system",
@@ -57,18 +57,10 @@ IMPORTANT:
 - Return valid JSON only
 - This is advisory only, not definitive medical advice
 """),
+    # Static output schema first, request-specific data last, so the
+    # prompt prefix is identical across calls (provider prompt caching)
     ("human",
-     """Analyze drug-drug interactions for these medications:
-
-Medications: {medications}
-
-Drug class data:
-{drug_classes}
-
-FDA adverse event signals:
-{fda_signals}
-
-Return JSON:
+     """Return JSON:
 {{
   "interactions": [
     {{
@@ -82,15 +74,55 @@ Return JSON:
 }}
 
 If no interactions found, return: {{"interactions": [], "summary": "No significant interactions detected"}}
+
+Analyze drug-drug interactions for these medications:
+
+Medications: {medications}
+
+Drug class data:
+{drug_classes}
+
+FDA adverse event signals:
+{fda_signals}
 """)
 ])
 
 
+# ==============================
+# Pipeline
+# ==============================
+
+async def _fetch_drug_classes(drug: dict) -> list[str]:
+    """Class lookup by RxNorm ID when already known, falling back to the name."""
+    classes = []
+    if drug["rxcui"]:
+        classes = await fetch_drug_classes_by_rxcui(drug["rxcui"])
+    if not classes:
+        classes = await fetch_drug_classes(drug["name"])
+    return classes
+
+
+async def _fetch_fda_signals(drug: dict) -> list:
+    return await fetch_openfda_interactions(drug["name"])
+
+
+# Layer 1 + 2: drug classes and FDA adverse event signals, fetched for
+# every drug concurrently (.map() runs the lookup once per input drug)
+fetch_context = RunnableParallel(
+    classes=RunnableLambda(_fetch_drug_classes).map(),
+    signals=RunnableLambda(_fetch_fda_signals).map()
+)
+
+# Layer 3: LLM-based interaction analysis (parser also strips code fences)
+interaction_chain = interaction_prompt | llm | JsonOutputParser()
+
+
 # ==============================
 # Main Interaction Checker
 # ==============================
 
-def check_interactions(medications: list[dict]) -> dict:
+
+async def check_interactions(medications: list[dict], api_results: list[ApiResult] = None) -> dict:
     """
     Check for drug-drug interactions among prescribed medications.
 
@@ -100,6 +132,8 @@ def check_interactions(medications: list[dict]) -> dict:
 
     Args:
         medications: list of medication dicts with at least "name" key
+        api_results: optional api_results from compute_confidence; their
+            RxNorm IDs are reused for the drug class lookup
 
     Returns:
         dict with interactions, total_checked, interactions_found, disclaimer
@@ -112,7 +146,10 @@ def check_interactions(medications: list[dict]) -> dict:
             "disclaimer": "Interaction detection is advisory only."
         }
 
-    med_names = [m.get("name", "") for m in medications if m.get("name")]
+    # Deduplicate (case-insensitive): the same drug at two doses is one drug
+    med_names = list({
+        m["name"].strip().lower(): m["name"] for m in medications if m.get("name")
+    }.values())
 
     if len(med_names) < 2:
         return {
@@ -122,44 +159,35 @@ def check_interactions(medications: list[dict]) -> dict:
             "disclaimer": "Interaction detection is advisory only."
         }
 
-    logger.info(f"[Interactions] Checking {len(med_names)} medications: {med_names}")
+    logger.info("[Interactions] Checking %d medications: %s", len(med_names), med_names)
 
-    # Layer 1: Fetch drug classes for context
-    drug_classes = {}
-    for name in med_names:
-        classes = fetch_drug_classes(name)
-        drug_classes[name] = classes if classes else ["Unknown"]
+    rxnorm_ids = {r.drug: r.rxnorm_id for r in api_results or []}
 
-    # Layer 2: Fetch FDA adverse event signals
-    fda_signals = {}
-    for name in med_names:
-        signals = fetch_openfda_interactions(name)
-        if signals:
-            fda_signals[name] = signals
-
-    # Layer 3: LLM-based interaction analysis
     try:
-        formatted_prompt = interaction_prompt.invoke({
-            "medications": json.dumps(med_names),
-            "drug_classes": json.dumps(drug_classes, indent=2),
-            "fda_signals": json.dumps(fda_signals, indent=2) if fda_signals else "No FDA signals found"
+        context = await fetch_context.ainvoke(
+            [{"name": n, "rxcui": rxnorm_ids.get(n)} for n in med_names]
+        )
+
+        drug_classes = {}
+        for name, classes in zip(med_names, context["classes"]):
+            drug_classes[name] = classes if classes else ["Unknown"]
+
+        fda_signals = {}
+        for name, signals in zip(med_names, context["signals"]):
+            if signals:
+                fda_signals[name] = signals
+
+        result = await interaction_chain.ainvoke({
+            # Compact JSON: the LLM does not need pretty-printing (fewer tokens)
+            "medications": orjson.dumps(med_names).decode(),
+            "drug_classes": orjson.dumps(drug_classes).decode(),
+            "fda_signals": orjson.dumps(fda_signals).decode() if fda_signals else "No FDA signals found"
         })
 
-        response = llm.invoke(formatted_prompt)
-        raw_output = response.content.strip()
-
-        # Strip markdown code fences if present
-        if raw_output.startswith("```"):
-            raw_output = raw_output.split("\n", 1)[-1]
-            if raw_output.endswith("```"):
-                raw_output = raw_output[:-3].strip()
-
-        result = json.loads(raw_output)
-
         interactions = result.get("interactions", [])
         total_pairs = len(list(combinations(med_names, 2)))
 
-        logger.info(f"[Interactions] Found {len(interactions)} interactions out of {total_pairs} pairs")
+        logger.info("[Interactions] Found %d interactions out of %d pairs", len(interactions), total_pairs)
 
         return {
             "interactions": interactions,
@@ -170,7 +198,7 @@ def check_interactions(medications: list[dict]) -> dict:
             "disclaimer": "Interaction detection is advisory only. Do not treat as definitive medical advice."
         }
 
-    except json.JSONDecodeError:
+    except OutputParserException:
         logger.error("[Interactions] LLM returned invalid JSON")
         return {
             "interactions": [],
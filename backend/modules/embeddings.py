@@ -0,0 +1,113 @@
+"""
+Embedding Model Module: One shared SentenceTransformer for ingestion and retrieval
+
+Documents (load_vectorstore.py) and queries (retrieval.py) must be embedded
+by the same model variant, so both get it from get_embedding_model().
+
+Backends (EMBEDDING_BACKEND env var):
+    - "torch" (default): vanilla PyTorch weights
+    - "onnx": ONNX Runtime; dynamic int8 quantized graph on CPU,
+      fp16-optimized graph on CUDA (requires sentence-transformers[onnx],
+      or [onnx-gpu] for CUDA)
+"""
+
+import os
+import threading
+from contextlib import suppress
+
+# ============================================================
+# CPU THREADS
+# ============================================================
+# PyTorch defaults to one intra-op thread per core in EVERY uvicorn worker,
+# so N workers oversubscribe the CPU N times (erratic p99 for embedding /
+# reranking). Split the cores between workers instead: set WEB_CONCURRENCY
+# to the worker count in the uvicorn/gunicorn launch.
+# Set before torch is imported so OpenMP/MKL pick it up as well.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+TORCH_NUM_THREADS = max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+os.environ.setdefault("OMP_NUM_THREADS", str(TORCH_NUM_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(TORCH_NUM_THREADS))
+
+import torch
+from sentence_transformers import SentenceTransformer
+
+torch.set_num_threads(TORCH_NUM_THREADS)
+# Only settable before the first parallel op (e.g. if torch was already used)
+with suppress(RuntimeError):
+    torch.set_num_interop_threads(1)
+
+# ============================================================
+# GPU/CPU CONFIGURATION
+# ============================================================
+device = "cuda" if torch.cuda.is_available() else "cpu"
+
+# ============================================================
+# MODEL CONFIGURATION
+# ============================================================
+# all-mpnet-base-v2: 768-dimensional embeddings, good for semantic similarity
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+EMBEDDING_DIM = 768
+EMBEDDING_MAX_SEQ_LENGTH = 512  # Truncate long sequences
+
+# Larger batches keep the GPU busy; CPU throughput plateaus much earlier
+EMBEDDING_BATCH_SIZE = 128 if device == "cuda" else 32
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+# Pre-exported graphs shipped in the model's Hugging Face repo (onnx/ folder)
+ONNX_FILE_NAME = os.getenv(
+    "EMBEDDING_ONNX_FILE",
+    "onnx/model_O4.onnx" if device == "cuda" else "onnx/model_qint8_avx512_vnni.onnx"
+)
+
+# Identifies the exact vectors a model variant produces (e.g. for cache keys)
+if EMBEDDING_BACKEND == "onnx":
+    EMBEDDING_MODEL_ID = f"{EMBEDDING_MODEL_NAME}:onnx:{ONNX_FILE_NAME}"
+elif device == "cuda":
+    EMBEDDING_MODEL_ID = f"{EMBEDDING_MODEL_NAME}:fp16"
+else:
+    EMBEDDING_MODEL_ID = EMBEDDING_MODEL_NAME
+
+
+_embedding_model = None
+_embedding_lock = threading.Lock()
+
+
+def get_embedding_model() -> SentenceTransformer:
+    """
+    Load the embedding model once per process, on first use (not at
+    import), so workers that never embed don't pay for it.
+
+    Returns:
+        SentenceTransformer: exposes the usual .encode(texts, batch_size, ...)
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        # Concurrent first calls (worker threads) load the model once
+        with _embedding_lock:
+            if _embedding_model is None:
+                _embedding_model = _load_embedding_model()
+    return _embedding_model
+
+
+def _load_embedding_model() -> SentenceTransformer:
+    if EMBEDDING_BACKEND == "onnx":
+        model = SentenceTransformer(
+            EMBEDDING_MODEL_NAME,
+            device=device,
+            backend="onnx",
+            model_kwargs={
+                "file_name": ONNX_FILE_NAME,
+                "provider": "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+            }
+        )
+    else:
+        model = SentenceTransformer(
+            EMBEDDING_MODEL_NAME,
+            device=device
+        )
+        if device == "cuda":
+            model.half()  # fp16 weights: faster matmuls, half the memory
+
+    model.max_seq_length = EMBEDDING_MAX_SEQ_LENGTH
+    return model
@@ -12,23 +12,17 @@ A hallucination is defined as:
 - A side effect not supported by DailyMed data
 """
 
-import os
-import json
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+import orjson
+import msgspec
 from langchain_core.prompts import ChatPromptTemplate
+from modules.clients import JSON_MAX_TOKENS, get_llm
+from modules.medical_api import ApiResult
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="openai/gpt-oss-120b",
-    temperature=0
-)
+# Shared, cached (deterministic) gpt-oss-120b; Groq enforces a JSON response
+llm = get_llm(max_tokens=JSON_MAX_TOKENS, json_mode=True)
 
 
 # ==============================
@@ -36,22 +30,19 @@ llm = ChatGroq(
 # ==============================
 
 def _extract_field_set(data: dict) -> set[str]:
-    """Recursively extract all non-null leaf values as strings for comparison."""
+    """Extract all non-null leaf values as strings for comparison."""
     values = set()
 
-    for key, value in data.items():
-        if value is None:
-            continue
-        if isinstance(value, dict):
-            values.update(_extract_field_set(value))
-        elif isinstance(value, list):
-            for item in value:
-                if isinstance(item, dict):
-                    values.update(_extract_field_set(item))
-                elif item is not None:
-                    values.add(str(item).lower().strip())
-        else:
-            values.add(str(value).lower().strip())
+    # Explicit stack instead of recursion: one result set, no per-level sets
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif node is not None:
+            values.add(str(node).lower().strip())
 
     return values
 
@@ -101,7 +92,7 @@ def compute_parsing_f1(predicted: dict, ground_truth: dict) -> dict:
 # API Grounding Coverage
 # ==============================
 
-def compute_grounding_coverage(api_results: list[dict]) -> dict:
+def compute_grounding_coverage(api_results: list[ApiResult]) -> dict:
     """
     Compute how well the medications are grounded in external APIs.
 
@@ -120,9 +111,9 @@ def compute_grounding_coverage(api_results: list[dict]) -> dict:
     grounded = 0
 
     for result in api_results:
-        drug = result.get("drug", "Unknown")
-        has_rxnorm = result.get("rxnorm_id") is not None
-        has_dailymed = result.get("dailymed_info") is not None
+        drug = result.drug or "Unknown"
+        has_rxnorm = result.rxnorm_id is not None
+        has_dailymed = result.dailymed_info is not None
         is_grounded = has_rxnorm or has_dailymed
 
         if is_grounded:
@@ -165,17 +156,10 @@ Analyze the answer against the source evidence and flag any unsupported claims.
 
 Return valid JSON only.
 """),
+    # Static output schema first, then per-session sources, then the
+    # answer, so the prompt prefix is shared across calls (prompt caching)
     ("human",
-     """Source prescription data:
-{prescription_json}
-
-Source API/drug data:
-{api_data}
-
-AI-generated answer to evaluate:
-{answer}
-
-Return JSON:
+     """Return JSON:
 {{
   "hallucinations": [
     {{
@@ -188,11 +172,20 @@ Return JSON:
   "is_grounded": true,
   "grounding_notes": "Brief assessment of answer quality"
 }}
+
+Source prescription data:
+{prescription_json}
+
+Source API/drug data:
+{api_data}
+
+AI-generated answer to evaluate:
+{answer}
 """)
 ])
 
 
-def detect_hallucinations(answer: str, prescription: dict, api_data: list) -> dict:
+async def detect_hallucinations(answer: str, prescription: dict, api_data: list[ApiResult]) -> dict:
     """
     Detect hallucinations in an LLM-generated answer.
 
@@ -214,25 +207,18 @@ def detect_hallucinations(answer: str, prescription: dict, api_data: list) -> di
         logger.info("[Evaluation] Running hallucination detection...")
 
         formatted_prompt = hallucination_prompt.invoke({
-            "prescription_json": json.dumps(prescription, indent=2),
-            "api_data": json.dumps(api_data, indent=2) if api_data else "No API data available",
+            # Compact JSON: the LLM does not need pretty-printing (fewer tokens)
+            "prescription_json": msgspec.json.encode(prescription).decode(),
+            "api_data": msgspec.json.encode(api_data).decode() if api_data else "No API data available",
             "answer": answer
         })
 
-        response = llm.invoke(formatted_prompt)
-        raw_output = response.content.strip()
-
-        # Strip markdown code fences if present
-        if raw_output.startswith("```"):
-            raw_output = raw_output.split("\n", 1)[-1]
-            if raw_output.endswith("```"):
-                raw_output = raw_output[:-3].strip()
-
-        result = json.loads(raw_output)
+        response = await llm.ainvoke(formatted_prompt)
+        result = orjson.loads(response.content)
 
         hallucination_count = result.get("hallucination_count", len(result.get("hallucinations", [])))
 
-        logger.info(f"[Evaluation] Hallucinations found: {hallucination_count}")
+        logger.info("[Evaluation] Hallucinations found: %s", hallucination_count)
 
         return {
             "hallucinations": result.get("hallucinations", []),
@@ -241,7 +227,7 @@ def detect_hallucinations(answer: str, prescription: dict, api_data: list) -> di
             "grounding_notes": result.get("grounding_notes", "")
         }
 
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         logger.error("[Evaluation] Hallucination detector returned invalid JSON")
         return {
             "hallucinations": [],
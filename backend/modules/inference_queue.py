@@ -0,0 +1,90 @@
+"""
+Inference Queue Module: Micro-batching for the local models
+
+Concurrent /ask/ requests each embed one query and rerank a handful of
+pairs. Run one by one, the models see tiny batches; collated, N requests
+cost about as much as one, since small transformer batches have nearly
+flat latency.
+
+A MicroBatcher collects items submitted from request handlers for up to
+MAX_WAIT_MS (or until MAX_BATCH items are waiting), runs one batched
+model call in a worker thread, and resolves each caller's future with its
+own result.
+"""
+
+import asyncio
+from typing import Any, Callable
+
+MAX_BATCH = 32
+MAX_WAIT_MS = 20
+
+
+class MicroBatcher:
+    """
+    Collate concurrent submit() calls into batched calls of ``batch_fn``.
+
+    Args:
+        batch_fn: blocking function mapping a list of items to a list of
+            results (same length and order); runs in a worker thread
+        max_batch: most items per batch_fn call
+        max_wait_ms: how long the first item of a batch waits for company
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list], list],
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS
+    ):
+        self._batch_fn = batch_fn
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, item) -> Any:
+        """Queue one item and wait for its result (exceptions propagate)."""
+        loop = asyncio.get_running_loop()
+        # Queue and worker belong to one event loop; a new loop (e.g. a
+        # second asyncio.run() in a script) gets fresh ones
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that were cancelled while queued don't need a result
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                results = await asyncio.to_thread(self._batch_fn, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
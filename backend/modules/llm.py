@@ -2,24 +2,16 @@
 LLM Module: Handles language model initialization and answer generation
 """
 
-import os
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+from typing import AsyncIterator
+from modules.clients import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 
-# Load environment variables
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
 # ============================================================
 # LLM INITIALIZATION
 # ============================================================
 # Using Groq's hosted LLM for fast inference
-llm = ChatGroq(
-    model="openai/gpt-oss-20b",
-    api_key=GROQ_API_KEY,
-    temperature=0  # Deterministic responses for medical queries
-)
+# Deterministic (temperature=0) responses for medical queries
+llm = get_llm("openai/gpt-oss-20b", cache=False)
 
 # ============================================================
 # PROMPT TEMPLATE
@@ -35,7 +27,7 @@ custom_prompt = ChatPromptTemplate.from_messages([
 # ============================================================
 # CURRENT IMPLEMENTATION: Manual RAG Pipeline
 # ============================================================
-def generate_answer(question: str, context: str):
+async def generate_answer(question: str, context: str):
     """
     Generate an answer using the LLM with provided context.
 
@@ -48,7 +40,8 @@ def generate_answer(question: str, context: str):
 
     Process:
         1. Format the prompt with context and question
-        2. Invoke LLM with the formatted prompt
+        2. Invoke LLM with the formatted prompt (async: the Groq request
+           does not hold the event loop)
         3. Return the text response
     """
     formatted_prompt = custom_prompt.invoke({
@@ -56,10 +49,26 @@ def generate_answer(question: str, context: str):
         "question": question
     })
 
-    response = llm.invoke(formatted_prompt)
+    response = await llm.ainvoke(formatted_prompt)
     return response.content
 
 
+async def stream_answer(question: str, context: str) -> AsyncIterator[str]:
+    """
+    Same as generate_answer, but yields the answer text as Groq streams
+    it, so the first tokens reach the client after prefill instead of
+    after the whole answer.
+    """
+    formatted_prompt = custom_prompt.invoke({
+        "context": context,
+        "question": question
+    })
+
+    async for chunk in llm.astream(formatted_prompt):
+        if chunk.content:
+            yield chunk.content
+
+
 # ============================================================
 # ALTERNATIVE APPROACH #1: LangChain LCEL Chains
 # ============================================================
@@ -0,0 +1,59 @@
+"""
+LLM Response Cache
+
+Exact-match cache for deterministic (temperature=0) chat model calls.
+Plugged into LangChain via ChatGroq(cache=...), so every invoke / ainvoke
+on a cached model is looked up before hitting the Groq API.
+
+Key   = sha256(llm_string + prompt)  (llm_string encodes model + params)
+Value = the generations returned by the model
+"""
+
+import hashlib
+import threading
+from typing import Optional
+
+from cachetools import TTLCache
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+
+LLM_CACHE_TTL_SECONDS = 60 * 60
+LLM_CACHE_MAXSIZE = 1024
+
+
+class LLMCache(BaseCache):
+    """
+    In-memory TTL cache for LLM generations.
+
+    Only attach this to models running with temperature=0 — with sampling
+    enabled a cached answer would hide the model's intended variability.
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_MAXSIZE, ttl: int = LLM_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            return self._cache.get(self._key(prompt, llm_string))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        with self._lock:
+            self._cache[self._key(prompt, llm_string)] = return_val
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+
+# Shared instance used by the prescription-mode LLMs
+llm_cache = LLMCache()
@@ -0,0 +1,14 @@
+"""
+Helpers for post-processing raw LLM output.
+"""
+
+import re
+
+# A leading ``` / ```json fence and a trailing ``` fence (handles \r\n too).
+# Anchored to the ends of the string so fences inside the payload are kept.
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z", re.IGNORECASE)
+
+
+def strip_fences(text: str) -> str:
+    """Remove a markdown code fence wrapped around an LLM response."""
+    return _FENCE_RE.sub("", text).strip()
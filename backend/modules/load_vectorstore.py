@@ -5,19 +5,30 @@ Process: Upload -> Parse -> Split -> Embed -> Store
 
 import os
 import asyncio
+import hashlib
+import shutil
+import diskcache
+import multiprocessing
+import numpy as np
 import torch
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 from dotenv import load_dotenv
 
-from pinecone import Pinecone, ServerlessSpec
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
+from pinecone import ServerlessSpec
+from pinecone.grpc import PineconeGRPC
+from logger import setup_logger
+from modules.pdf_parsing import prepare_pdf
+from modules.embeddings import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL_ID,
+    get_embedding_model,
+)
 
-# ============================================================
-# GPU/CPU CONFIGURATION
-# ============================================================
-device = "cuda" if torch.cuda.is_available() else "cpu"
+logger = setup_logger(__name__)
 
 # ============================================================
 # ENVIRONMENT VARIABLES
@@ -28,125 +39,215 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = "us-east-1"
 PINECONE_INDEX_NAME = "medi"    
 
+# Vectors are L2-normalized at ingest (encode_with_cache) and at query time
+# (retrieval.py), so the raw dot product equals cosine similarity and the
+# index can use the cheapest metric. Keep both sides normalized.
+PINECONE_METRIC = "dotproduct"
+
 UPLOAD_DIR = "./uploaded_pdfs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+COPY_BUFFER_SIZE = 1024 * 1024
+
+EMBEDDING_CACHE_DIR = "./emb_cache"
+
+# Vectors per Pinecone upsert request (amortizes request overhead)
+UPSERT_BATCH_SIZE = 500
 
 # ============================================================
 # PINECONE INITIALIZATION
 # ============================================================
-# Initialize Pinecone client
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Initialize Pinecone client (gRPC data plane: binary payloads, and
+# upsert(..., async_req=True) returns a future instead of blocking)
+pc = PineconeGRPC(api_key=PINECONE_API_KEY)
 spec = ServerlessSpec(
     cloud="aws",
     region=PINECONE_ENV
 )
 
 # Check if index exists, create if not
-existing_indexes = [i["name"] for i in pc.list_indexes()]
+existing_indexes = {i["name"]: i for i in pc.list_indexes()}
 
 if PINECONE_INDEX_NAME not in existing_indexes:
     pc.create_index(
         name=PINECONE_INDEX_NAME,
-        dimension=768,  # Matches all-mpnet-base-v2 embedding dimension
-        metric="cosine",  # Cosine similarity for semantic search
+        dimension=EMBEDDING_DIM,  # Matches all-mpnet-base-v2 embedding dimension
+        metric=PINECONE_METRIC,  # == cosine similarity on normalized vectors
         spec=spec
     )
+elif existing_indexes[PINECONE_INDEX_NAME]["metric"] != PINECONE_METRIC:
+    # The metric is fixed at creation: an index created before the switch
+    # keeps its old one (results are the same on normalized vectors, only
+    # dotproduct's cheaper scoring is missed) until it is recreated
+    logger.warning(
+        "Pinecone index '%s' uses metric '%s', not '%s'; delete and recreate "
+        "it (then re-upload the PDFs) to use '%s'",
+        PINECONE_INDEX_NAME, existing_indexes[PINECONE_INDEX_NAME]["metric"],
+        PINECONE_METRIC, PINECONE_METRIC
+    )
 
 index = pc.Index(PINECONE_INDEX_NAME)
 
 # ============================================================
-# EMBEDDING MODEL
+# PDF PROCESS POOL
 # ============================================================
-# Using SentenceTransformer directly for better performance
-# Note: We're NOT using HuggingFaceEmbeddings wrapper for faster encoding
-embedding_model = SentenceTransformer(
-    "sentence-transformers/all-mpnet-base-v2",
-    device=device
-)
+# PDF parsing and text splitting are CPU-bound Python (GIL-bound in
+# threads), so files are prepared in worker processes. The pool is
+# created on the first upload. Workers are spawned (not forked from a
+# process holding gRPC/CUDA state) and only import modules/pdf_parsing.py.
+@lru_cache(maxsize=1)
+def get_pdf_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def shutdown_pdf_pool():
+    """Stop the PDF worker processes (called from the FastAPI lifespan)."""
+    if get_pdf_pool.cache_info().currsize:
+        get_pdf_pool().shutdown(cancel_futures=True)
+
+# ============================================================
+# EMBEDDING CACHE
+# ============================================================
+# Persistent, content-addressed cache: re-uploading a PDF (retry, another
+# namespace) reuses the stored vectors instead of re-running the model.
+# Key = blake2b(model variant + dtype + chunk text), Value = float16 vector bytes
+# (half the disk of float32; the loss is negligible for normalized cosine
+# vectors, and Pinecone itself always stores float32)
+embedding_cache = diskcache.Cache(EMBEDDING_CACHE_DIR)
+EMBEDDING_CACHE_DTYPE = np.float16
+_EMBEDDING_KEY_PREFIX = f"{EMBEDDING_MODEL_ID}\0{np.dtype(EMBEDDING_CACHE_DTYPE).name}\0"
+
+
+def _embedding_key(text: str) -> str:
+    return hashlib.blake2b(
+        (_EMBEDDING_KEY_PREFIX + text).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+def encode_with_cache(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts, only running the model on chunks not seen before.
+
+    Returns:
+        np.ndarray: (len(texts), 768) float32, normalized embeddings
+    """
+    # Repeated headers/footers chunk into identical strings: embed each
+    # distinct text once, then scatter the vectors back to every position
+    unique_texts = list(dict.fromkeys(texts))
+    if len(unique_texts) < len(texts):
+        position = {text: i for i, text in enumerate(unique_texts)}
+        inverse = np.fromiter((position[text] for text in texts), dtype=np.intp, count=len(texts))
+        return encode_with_cache(unique_texts)[inverse]
+
+    embeddings = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    keys = [_embedding_key(text) for text in texts]
+
+    miss_idx = []
+    for i, key in enumerate(keys):
+        cached = embedding_cache.get(key)
+        if cached is None:
+            miss_idx.append(i)
+        else:
+            embeddings[i] = np.frombuffer(cached, dtype=EMBEDDING_CACHE_DTYPE)
+
+    if miss_idx:
+        # encode() converts text chunks to 768-dimensional vectors
+        # Using SentenceTransformer directly for better performance
+        # Note: We're NOT using HuggingFaceEmbeddings wrapper for faster encoding
+        # Shared with retrieval.py (torch or ONNX backend, loaded on first use,
+        # see modules/embeddings.py)
+        # Kept as a tensor on the model's device (normalized there), then
+        # cast to the cache dtype and copied to the host once: half the
+        # transfer of float32, and new vectors match cache hits exactly
+        new_embeddings = get_embedding_model().encode(
+            [texts[i] for i in miss_idx],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            show_progress_bar=False,  # tqdm is pure overhead in a server worker
+            convert_to_tensor=True,
+            normalize_embeddings=True
+        )
+        stored = new_embeddings.to(torch.float16).cpu().numpy()  # == EMBEDDING_CACHE_DTYPE
+        embeddings[miss_idx] = stored
+
+        # One transaction for all writes instead of one commit per vector
+        with embedding_cache.transact():
+            for i, vector in zip(miss_idx, stored):
+                embedding_cache.set(keys[i], vector.tobytes())
+
+    return embeddings
 
 
 # ============================================================
 # PDF PROCESSING PIPELINE
 # ============================================================
-async def process_single_file(file, namespace: str):
+def save_file(file) -> str:
     """
-    Process one uploaded PDF and store in Pinecone.
+    Save one uploaded PDF to UPLOAD_DIR (blocking; run in a thread).
 
     Args:
         file: FastAPI UploadFile object
-        namespace (str): Pinecone namespace for organization
 
     Returns:
-        int: Number of chunks created from this PDF
-
-    Pipeline:
-        1. Save uploaded file to disk
-        2. Load PDF using PyPDFLoader
-        3. Split into chunks using RecursiveCharacterTextSplitter
-        4. Generate embeddings using SentenceTransformer
-        5. Upsert vectors to Pinecone with metadata
+        str: Path of the saved PDF
     """
-    # ============================================================
-    # STEP 1: SAVE FILE
-    # ============================================================
+    # Streamed in 1 MiB blocks instead of reading the whole PDF into memory
     save_path = Path(UPLOAD_DIR) / file.filename
     with open(save_path, "wb") as f:
-        f.write(file.file.read())
+        shutil.copyfileobj(file.file, f, COPY_BUFFER_SIZE)
+    return str(save_path)
 
-    # ============================================================
-    # STEP 2: LOAD PDF
-    # ============================================================
-    # PyPDFLoader extracts text from PDF pages
-    loader = PyPDFLoader(str(save_path))
-    documents = loader.load()
 
-    # ============================================================
-    # STEP 3: SPLIT INTO CHUNKS
-    # ============================================================
-    # RecursiveCharacterTextSplitter splits on paragraphs, sentences, words
-    # chunk_size=500: Each chunk ~500 characters
-    # chunk_overlap=50: 50 characters overlap between chunks for context
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50
-    )
-    chunks = splitter.split_documents(documents)
+async def prepare_file(file):
+    """
+    Save, parse and chunk one uploaded PDF.
 
-    # Extract text and metadata
-    texts = [chunk.page_content for chunk in chunks]
-    metadatas = [chunk.metadata for chunk in chunks]
+    Args:
+        file: FastAPI UploadFile object
 
-    # Generate unique IDs for each chunk
-    ids = [f"{Path(save_path).stem}-{i}" for i in range(len(chunks))]
+    Returns:
+        tuple: (ids, texts, metadatas) for every chunk of the PDF
 
-    # ============================================================
-    # STEP 4: GENERATE EMBEDDINGS
-    # ============================================================
-    # Run embedding in thread pool to avoid blocking async loop
-    # encode() converts text chunks to 768-dimensional vectors
-    embeddings = await asyncio.to_thread(
-        embedding_model.encode,
-        texts,
-        batch_size=32,
-        show_progress_bar=True,
-        convert_to_numpy=True,
-        normalize_embeddings=True
-    )
+    Pipeline:
+        1. Save uploaded file to disk (thread: UploadFile can't be pickled)
+        2. Load PDF pages using PyMuPDF and split into chunks
+           (worker process, see modules/pdf_parsing.py)
+    """
+    save_path = await asyncio.to_thread(save_file, file)
 
-    # ============================================================
-    # STEP 5: UPSERT TO PINECONE
-    # ============================================================
-    # Store vectors with IDs and metadata in Pinecone
-    # Note: Must store text in metadata since Pinecone only stores vectors
-    for i, (id_, embedding, metadata) in enumerate(zip(ids, embeddings, metadatas)):
-        metadata["text"] = texts[i]  # Add text to metadata for retrieval
-
-    index.upsert(
-        vectors=zip(ids, embeddings, metadatas),
-        namespace=namespace
-    )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pdf_pool(), prepare_pdf, save_path)
 
-    return len(chunks)
+
+def _start_upserts(vectors, namespace: str) -> list:
+    """
+    Issue one async gRPC upsert per UPSERT_BATCH_SIZE slice of vectors.
+    Building the request protobufs is CPU work, so this runs in a thread.
+
+    Returns:
+        list[concurrent.futures.Future]: one future per batch
+    """
+    vectors = iter(vectors)
+    futures = []
+    while batch := list(islice(vectors, UPSERT_BATCH_SIZE)):
+        futures.append(index.upsert(
+            vectors=batch,
+            namespace=namespace,
+            async_req=True
+        ))
+    return futures
+
+
+async def upsert_vectors(vectors, namespace: str):
+    """
+    Store (id, embedding, metadata) tuples in Pinecone.
+
+    All batches are in flight together; the event loop awaits their
+    futures without holding a thread (raises if any batch failed).
+    """
+    futures = await asyncio.to_thread(_start_upserts, vectors, namespace)
+    await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
 
 
 # ============================================================
@@ -154,7 +255,7 @@ async def process_single_file(file, namespace: str):
 # ============================================================
 async def load_vectorstore_async(uploaded_files, namespace):
     """
-    Process multiple PDF files concurrently.
+    Process multiple PDF files into Pinecone.
 
     Args:
         uploaded_files (List[UploadFile]): List of PDF files
@@ -163,15 +264,42 @@ async def load_vectorstore_async(uploaded_files, namespace):
     Returns:
         dict: Stats about files processed and chunks created
 
-    Note: Uses asyncio.gather() for concurrent processing
+    Process:
+        1. Prepare (save/parse/split) all files concurrently, parsing in
+           parallel worker processes
+        2. Embed the chunks of ALL files in one encode() call, so the GPU
+           sees large batches instead of one small batch per PDF
+        3. Upsert all vectors in batches of UPSERT_BATCH_SIZE
     """
-    tasks = [
-        process_single_file(file, namespace)
+    # ============================================================
+    # STEP 1: PREPARE FILES
+    # ============================================================
+    prepared = await asyncio.gather(*(
+        prepare_file(file)
         for file in uploaded_files
-    ]
-    results = await asyncio.gather(*tasks)
+    ))
+
+    all_texts = [text for _, texts, _ in prepared for text in texts]
+
+    # ============================================================
+    # STEP 2: GENERATE EMBEDDINGS
+    # ============================================================
+    # Run embedding in thread pool to avoid blocking async loop
+    # Cached chunks are served from disk; only new ones hit the model
+    embeddings = await asyncio.to_thread(encode_with_cache, all_texts)
+
+    # ============================================================
+    # STEP 3: UPSERT TO PINECONE
+    # ============================================================
+    # One batched upsert for the chunks of all files
+    # (metadata already carries the chunk text, see prepare_file)
+    all_ids = [id_ for ids, _, _ in prepared for id_ in ids]
+    all_metadatas = [metadata for _, _, metadatas in prepared for metadata in metadatas]
+
+    # One bulk ndarray -> list conversion instead of one per vector
+    await upsert_vectors(zip(all_ids, embeddings.tolist(), all_metadatas), namespace)
 
     return {
         "Files_Processed": len(uploaded_files),
-        "Total_Chunks_Created": sum(results)
-    }
\ No newline at end of file
+        "Total_Chunks_Created": len(all_texts)
+    }
@@ -1,104 +1,305 @@
-import requests
+import asyncio
+import functools
+import diskcache
+import httpx
+import msgspec
+from cachetools import TTLCache
+from urllib.parse import quote_plus
 
 
 # -----------------------------
-# RxNorm → Standard ID
+# Endpoints
 # -----------------------------
+# Query values are URL-encoded with quote_plus before formatting, so names
+# with spaces or special characters ("insulin glargine", "co-trimoxazole")
+# build valid URLs.
+
+RXNORM_URL_TMPL = "https://rxnav.nlm.nih.gov/REST/rxcui.json?name={name}"
+DAILYMED_URL_TMPL = "https://dailymed.nlm.nih.gov/dailymed/services/v2/spls.json?drug_name={name}"
+RXCLASS_BY_NAME_URL_TMPL = (
+    "https://rxnav.nlm.nih.gov/REST/rxclass/class/byDrugName.json"
+    "?drugName={name}&relaSource=ATC"
+)
+RXCLASS_BY_RXCUI_URL_TMPL = (
+    "https://rxnav.nlm.nih.gov/REST/rxclass/class/byRxcui.json"
+    "?rxcui={rxcui}&relaSource=ATC"
+)
+OPENFDA_URL_TMPL = (
+    "https://api.fda.gov/drug/event.json"
+    "?search=patient.drug.medicinalproduct:\"{name}\""
+    "+AND+patient.reaction.reactionmeddrapt:\"drug interaction\""
+    "&limit=5"
+)
 
-def fetch_rxnorm_id(drug_name: str):
-    url = f"https://rxnav.nlm.nih.gov/REST/rxcui.json?name={drug_name}"
-    r = requests.get(url)
 
-    if r.status_code != 200:
-        return None
+# -----------------------------
+# HTTP client
+# -----------------------------
+# One pooled async client for every lookup: keep-alive connections are
+# reused across drugs and uploads instead of a new TLS handshake per call.
+# HTTP/2 (where the server supports it, e.g. OpenFDA) multiplexes the
+# concurrent lookups of one upload over a single connection.
+
+REQUEST_TIMEOUT_SECONDS = 10
+
+# Rate-limited (429) / temporarily unavailable (503) responses are retried
+# with exponential backoff: 0.5s, 1s, 2s (or the server's Retry-After)
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_STATUS_CODES = frozenset({429, 503})
+
+_client = httpx.AsyncClient(
+    http2=True,
+    timeout=REQUEST_TIMEOUT_SECONDS,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+)
+
+
+async def _get(url: str) -> httpx.Response:
+    """GET with retry/backoff on rate limiting; other statuses are returned as-is."""
+    for attempt in range(MAX_RETRIES + 1):
+        r = await _client.get(url)
+        if r.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+            return r
 
-    data = r.json()
+        delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+        retry_after = r.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = min(int(retry_after), REQUEST_TIMEOUT_SECONDS)
+        await asyncio.sleep(delay)
 
-    if "idGroup" in data and "rxnormId" in data["idGroup"]:
-        return data["idGroup"]["rxnormId"][0]
 
-    return None
+async def aclose_client():
+    """Close the pooled HTTP client (called from the FastAPI lifespan)."""
+    await _client.aclose()
 
 
 # -----------------------------
-# DailyMed → Drug Label Summary
+# Lookup cache
+# -----------------------------
+# Drug lookups are deterministic per drug name, so results are memoized
+# (keyed by the normalized name) to avoid refetching the same drug on
+# every upload / question.
+
+CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_MAXSIZE = 4096
+# Empty results (None / []) may be a transient API failure (timeout, 5xx):
+# they are remembered only briefly, in a separate cache, so one failed
+# lookup doesn't hide a drug's data for CACHE_TTL_SECONDS
+NEGATIVE_CACHE_TTL_SECONDS = 5 * 60
+CACHE_DIR = "./drug_api_cache"
+
+# On-disk copy of successful lookups so a restart does not start cold.
+# Empty results are never written to disk (see NEGATIVE_CACHE_TTL_SECONDS).
+_disk_cache = diskcache.Cache(CACHE_DIR)
+
+
+def _drug_key(drug_name: str) -> str:
+    return (drug_name or "").strip().lower()
+
+
+def _ttl_cache():
+    """
+    TTL memoization for async lookups (memory, then disk). Concurrent
+    calls for the same drug share one in-flight lookup instead of each
+    fetching it. Empty results are kept for NEGATIVE_CACHE_TTL_SECONDS only.
+    """
+    def decorator(func):
+        cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL_SECONDS)
+        negative_cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=NEGATIVE_CACHE_TTL_SECONDS)
+        in_flight = {}
+
+        async def load(drug_name, disk_key):
+            # diskcache is synchronous SQLite I/O: run it in a worker thread,
+            # not on the event loop. Once per in-flight lookup, not per caller.
+            result = await asyncio.to_thread(_disk_cache.get, disk_key)
+            if result is not None:
+                return result
+
+            result = await func(drug_name)
+            if result:
+                await asyncio.to_thread(_disk_cache.set, disk_key, result, expire=CACHE_TTL_SECONDS)
+            return result
+
+        @functools.wraps(func)
+        async def wrapper(drug_name):
+            key = _drug_key(drug_name)
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+            try:
+                return negative_cache[key]
+            except KeyError:
+                pass
+
+            task = in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(load(drug_name, (func.__name__, key)))
+                in_flight[key] = task
+                task.add_done_callback(lambda _: in_flight.pop(key, None))
+
+            # shield: a cancelled caller must not cancel the shared lookup
+            result = await asyncio.shield(task)
+            if result:
+                cache[key] = result
+            else:
+                negative_cache[key] = result
+            return result
+
+        wrapper.cache = cache
+        wrapper.negative_cache = negative_cache
+        return wrapper
+
+    return decorator
+
+
 # -----------------------------
+# Per-drug API result
+# -----------------------------
+
+class ApiResult(msgspec.Struct):
+    """RxNorm + DailyMed lookup result for one prescribed drug."""
+    drug: str
+    rxnorm_id: str | None = None
+    dailymed_info: dict | None = None
 
-def fetch_dailymed_summary(drug_name: str):
-    url = f"https://dailymed.nlm.nih.gov/dailymed/services/v2/spls.json?drug_name={drug_name}"
-    r = requests.get(url)
 
-    if r.status_code != 200:
+# -----------------------------
+# RxNorm → Standard ID
+# -----------------------------
+
+@_ttl_cache()
+async def fetch_rxnorm_id(drug_name: str):
+    # Nameless medication (parser emitted "name": null / ""): nothing to look up
+    if not drug_name or not drug_name.strip():
         return None
 
-    data = r.json()
+    url = RXNORM_URL_TMPL.format(name=quote_plus(drug_name))
+
+    try:
+        r = await _get(url)
+
+        if r.status_code != 200:
+            return None
+
+        data = r.json()
+
+        if "idGroup" in data and "rxnormId" in data["idGroup"]:
+            return data["idGroup"]["rxnormId"][0]
 
-    if "data" not in data or len(data["data"]) == 0:
         return None
 
-    # Get first match
-    spl = data["data"][0]
+    except Exception:
+        return None
 
-    return {
-        "title": spl.get("title"),
-        "setid": spl.get("setid"),
-        "published_date": spl.get("published_date"),
-    }
+
+# -----------------------------
+# DailyMed → Drug Label Summary
+# -----------------------------
+
+@_ttl_cache()
+async def fetch_dailymed_summary(drug_name: str):
+    # Nameless medication (parser emitted "name": null / ""): nothing to look up
+    if not drug_name or not drug_name.strip():
+        return None
+
+    url = DAILYMED_URL_TMPL.format(name=quote_plus(drug_name))
+
+    try:
+        r = await _get(url)
+
+        if r.status_code != 200:
+            return None
+
+        data = r.json()
+
+        if "data" not in data or len(data["data"]) == 0:
+            return None
+
+        # Get first match
+        spl = data["data"][0]
+
+        return {
+            "title": spl.get("title"),
+            "setid": spl.get("setid"),
+            "published_date": spl.get("published_date"),
+        }
+
+    except Exception:
+        return None
 
 
 # -----------------------------
 # RxClass → Drug Classes
 # -----------------------------
 
-def fetch_drug_classes(drug_name: str) -> list[str]:
+@_ttl_cache()
+async def fetch_drug_classes(drug_name: str) -> list[str]:
     """
     Fetch pharmacological classes for a drug via RxClass API.
     Returns list of class names (e.g., ["Anticoagulants", "Vitamin K Antagonists"]).
     """
-    url = (
-        f"https://rxnav.nlm.nih.gov/REST/rxclass/class/byDrugName.json"
-        f"?drugName={drug_name}&relaSource=ATC"
-    )
+    url = RXCLASS_BY_NAME_URL_TMPL.format(name=quote_plus(drug_name))
 
     try:
-        r = requests.get(url, timeout=10)
+        r = await _get(url)
 
         if r.status_code != 200:
             return []
 
-        data = r.json()
-        classes = []
+        return _parse_drug_classes(r.json())
+
+    except Exception:
+        return []
 
-        concept_groups = data.get("rxclassDrugInfoList", {}).get("rxclassDrugInfo", [])
-        for info in concept_groups:
-            class_name = info.get("rxclassMinConceptItem", {}).get("className")
-            if class_name and class_name not in classes:
-                classes.append(class_name)
 
-        return classes
+@_ttl_cache()
+async def fetch_drug_classes_by_rxcui(rxcui: str) -> list[str]:
+    """
+    Same as fetch_drug_classes, but for an already-resolved RxNorm ID
+    (e.g. from fetch_rxnorm_id), skipping the name resolution step.
+    """
+    url = RXCLASS_BY_RXCUI_URL_TMPL.format(rxcui=quote_plus(rxcui))
+
+    try:
+        r = await _get(url)
+
+        if r.status_code != 200:
+            return []
+
+        return _parse_drug_classes(r.json())
 
     except Exception:
         return []
 
 
+def _parse_drug_classes(data: dict) -> list[str]:
+    classes = []
+
+    concept_groups = data.get("rxclassDrugInfoList", {}).get("rxclassDrugInfo", [])
+    for info in concept_groups:
+        class_name = info.get("rxclassMinConceptItem", {}).get("className")
+        if class_name and class_name not in classes:
+            classes.append(class_name)
+
+    return classes
+
+
 # -----------------------------
 # OpenFDA → Adverse Events
 # -----------------------------
 
-def fetch_openfda_interactions(drug_name: str) -> list[str]:
+@_ttl_cache()
+async def fetch_openfda_interactions(drug_name: str) -> list[str]:
     """
     Query OpenFDA drug adverse events for interaction-related reports.
     Returns list of reported interaction terms.
     """
-    url = (
-        f"https://api.fda.gov/drug/event.json"
-        f"?search=patient.drug.medicinalproduct:\"{drug_name}\""
-        f"+AND+patient.reaction.reactionmeddrapt:\"drug interaction\""
-        f"&limit=5"
-    )
+    url = OPENFDA_URL_TMPL.format(name=quote_plus(drug_name))
 
     try:
-        r = requests.get(url, timeout=10)
+        r = await _get(url)
 
         if r.status_code != 200:
             return []
@@ -0,0 +1,64 @@
+"""
+PDF Parsing Module: Parse + split a saved PDF into chunks
+
+Runs inside ProcessPoolExecutor workers (see load_vectorstore.py), so it
+only imports what parsing needs: worker processes must not load the
+embedding model or connect to Pinecone.
+"""
+
+from pathlib import Path
+
+import pymupdf
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# ============================================================
+# TEXT SPLITTER
+# ============================================================
+# Built once per process and reused for every file
+# RecursiveCharacterTextSplitter splits on paragraphs, sentences, words
+# chunk_size=500: Each chunk ~500 characters
+# chunk_overlap=50: 50 characters overlap between chunks for context
+SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=500,
+    chunk_overlap=50,
+    length_function=len,
+    is_separator_regex=False
+)
+
+
+def _iter_pdf_pages(path):
+    """Yield one Document per PDF page (same metadata keys as PyPDFLoader)."""
+    with pymupdf.open(path) as pdf:
+        for page_number, page in enumerate(pdf):
+            yield Document(
+                page_content=page.get_text(),
+                metadata={"source": str(path), "page": page_number}
+            )
+
+
+def prepare_pdf(path: str):
+    """
+    Parse and chunk one PDF already saved to disk (CPU-bound).
+
+    Args:
+        path: Path to the saved PDF
+
+    Returns:
+        tuple: (ids, texts, metadatas) for every chunk of the PDF
+    """
+    # PyMuPDF (MuPDF C library) extracts text from PDF pages; pages are
+    # yielded one at a time, so the splitter consumes them as they are
+    # parsed instead of holding the whole PDF first
+    chunks = SPLITTER.split_documents(_iter_pdf_pages(path))
+
+    # Extract text and metadata
+    # Note: Must store text in metadata since Pinecone only stores vectors
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [{**chunk.metadata, "text": chunk.page_content} for chunk in chunks]
+
+    # Generate unique IDs for each chunk
+    stem = Path(path).stem
+    ids = [f"{stem}-{i}" for i in range(len(chunks))]
+
+    return ids, texts, metadatas
@@ -1,18 +1,13 @@
-import os
 import json
-from dotenv import load_dotenv
 from typing import List, Optional
 from pydantic import BaseModel, ValidationError
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+from modules.clients import get_llm
+from modules.llm_utils import strip_fences
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
-# Load environment variables
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
 
 # ==============================
 # Structured Schema Definition
@@ -46,11 +41,7 @@ class PrescriptionData(BaseModel):
 # LLM Setup
 # ==============================
 
-llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="openai/gpt-oss-120b",
-    temperature=0
-)
+llm = get_llm(cache=False)
 
 
 prompt = ChatPromptTemplate.from_messages([
@@ -118,7 +109,7 @@ def parse_prescription(ocr_text: str) -> dict:
 
         response = llm.invoke(formatted_prompt)
 
-        raw_output = response.content.strip()
+        raw_output = strip_fences(response.content)
 
         # Attempt JSON parsing
         parsed_json = json.loads(raw_output)
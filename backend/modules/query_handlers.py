@@ -3,14 +3,77 @@ Query Handler Module: Orchestrates the RAG pipeline
 Retrieval -> Context Building -> LLM Generation
 """
 
+from typing import AsyncIterator
+from cachetools import TTLCache
 from logger import setup_logger
+from modules.embeddings import WEB_CONCURRENCY
 from modules.retrieval import retrieve_with_rerank
-from modules.llm import generate_answer
+from modules.session_store import bump_namespace_version, get_namespace_version, redis_client
+from modules.llm import generate_answer, stream_answer
 
 logger = setup_logger(__name__)
 
+# ============================================================
+# ANSWER CACHE
+# ============================================================
+# Repeat questions on the same namespace return the previous
+# {response, source} without retrieval, reranking or the LLM call.
+# Key = (namespace, namespace version, normalized question); uploading
+# new PDFs to a namespace invalidates its entries (see routes/upload_pdf.py).
+#
+# The cache itself is per process. With REDIS_URL set, the namespace
+# version lives in Redis (see session_store.py), so an upload handled by
+# one worker makes every worker's old entries unreachable. Without Redis,
+# only the uploading worker would notice: the cache is then only enabled
+# with a single worker (WEB_CONCURRENCY=1).
+ANSWER_CACHE_MAXSIZE = 1024
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_ENABLED = redis_client is not None or WEB_CONCURRENCY == 1
+
+answer_cache = TTLCache(maxsize=ANSWER_CACHE_MAXSIZE, ttl=ANSWER_CACHE_TTL_SECONDS)
+
+
+async def _answer_key(user_input: str, namespace: str) -> tuple:
+    # No Redis: version is always 0, returned without any I/O
+    version = await get_namespace_version(namespace) if redis_client is not None else 0
+    return namespace, version, " ".join(user_input.lower().split())
+
+
+async def _cached_answer(user_input: str, namespace: str) -> tuple:
+    """(cache key, cached response or None); (None, None) when the cache is off."""
+    if not ANSWER_CACHE_ENABLED:
+        return None, None
+    cache_key = await _answer_key(user_input, namespace)
+    return cache_key, answer_cache.get(cache_key)
+
+
+def _store_answer(cache_key, response: dict):
+    if cache_key is not None:
+        answer_cache[cache_key] = response
+
+
+NO_CONTEXT_RESPONSE = "I'm sorry, but I couldn't find relevant information in the provided context"
 
-def query_chain(user_input: str, namespace: str):
+
+def _context_and_sources(documents: list) -> tuple[str, list]:
+    """One pass over the reranked chunks: prompt context + source files."""
+    texts, sources = zip(*(
+        (doc["text"], doc["metadata"].get("source", ""))
+        for doc in documents
+    ))
+    return "\n\n".join(texts), list(sources)
+
+
+async def invalidate_namespace(namespace: str):
+    """Forget cached answers for a namespace whose documents changed."""
+    # Other workers: their keys for the old version are never looked up again
+    await bump_namespace_version(namespace)
+    # This worker: free the entries now instead of at TTL expiry
+    for key in [key for key in list(answer_cache.keys()) if key[0] == namespace]:
+        answer_cache.pop(key, None)
+
+
+async def query_chain(user_input: str, namespace: str):
     """
     Execute the complete RAG pipeline for a user question.
 
@@ -28,7 +91,12 @@ def query_chain(user_input: str, namespace: str):
         4. Return answer with source metadata
     """
     try:
-        logger.debug(f"Running chain for input: {user_input}")
+        logger.debug("Running chain for input: %s", user_input)
+
+        cache_key, cached = await _cached_answer(user_input, namespace)
+        if cached is not None:
+            logger.debug("Answer cache hit")
+            return cached
 
         # ============================================================
         # STEP 1: RETRIEVE RELEVANT CHUNKS
@@ -36,14 +104,14 @@ def query_chain(user_input: str, namespace: str):
         # Uses hybrid retrieval:
         # - Dense retrieval: Get top 7 chunks via vector similarity
         # - Reranking: Use cross-encoder to refine to top 4 most relevant
-        documents = retrieve_with_rerank(
+        documents = await retrieve_with_rerank(
             query=user_input,
             namespace=namespace
         )
 
         if not documents:
             return {
-                "response": "I'm sorry, but I couldn't find relevant information in the provided context",
+                "response": NO_CONTEXT_RESPONSE,
                 "source": []
             }
 
@@ -52,13 +120,14 @@ def query_chain(user_input: str, namespace: str):
         # ============================================================
         # Combine retrieved chunks into single context string
         # This context will be inserted into the LLM prompt
-        context = "\n\n".join([doc["text"] for doc in documents])
+        # (source file paths are collected in the same pass)
+        context, sources = _context_and_sources(documents)
 
         # ============================================================
         # STEP 3: GENERATE ANSWER
         # ============================================================
         # Send context + question to LLM for answer generation
-        answer = generate_answer(
+        answer = await generate_answer(
             question=user_input,
             context=context
         )
@@ -66,15 +135,14 @@ def query_chain(user_input: str, namespace: str):
         # ============================================================
         # STEP 4: FORMAT RESPONSE
         # ============================================================
-        # Extract source file paths from document metadata
+        # Source file paths from document metadata (see STEP 2)
         response = {
             "response": answer,
-            "source": [
-                doc["metadata"].get("source", "")
-                for doc in documents
-            ]
+            "source": sources
         }
 
+        _store_answer(cache_key, response)
+
         logger.debug("Query processed successfully")
         return response
 
@@ -83,6 +151,49 @@ def query_chain(user_input: str, namespace: str):
         raise
 
 
+async def stream_query_chain(user_input: str, namespace: str) -> AsyncIterator[tuple]:
+    """
+    Streaming variant of query_chain.
+
+    Yields:
+        ("token", str) for each piece of the answer as the LLM produces it,
+        then one ("source", list) with the source files, once the answer
+        is complete (same content as query_chain's response)
+    """
+    cache_key, cached = await _cached_answer(user_input, namespace)
+    if cached is not None:
+        logger.debug("Answer cache hit")
+        yield "token", cached["response"]
+        yield "source", cached["source"]
+        return
+
+    documents = await retrieve_with_rerank(
+        query=user_input,
+        namespace=namespace
+    )
+
+    if not documents:
+        yield "token", NO_CONTEXT_RESPONSE
+        yield "source", []
+        return
+
+    context, sources = _context_and_sources(documents)
+
+    parts = []
+    async for token in stream_answer(question=user_input, context=context):
+        parts.append(token)
+        yield "token", token
+
+    response = {
+        "response": "".join(parts),
+        "source": sources
+    }
+    # Only a fully streamed answer is cached (not one cut off by a disconnect)
+    _store_answer(cache_key, response)
+
+    yield "source", response["source"]
+
+
 # ============================================================
 # ALTERNATIVE APPROACH: Using LangChain Chains
 # ============================================================
@@ -4,12 +4,19 @@ Implements hybrid retrieval: Dense retrieval + Cross-encoder reranking
 """
 
 import os
-import torch
+import asyncio
+import threading
 from typing import List, Dict
 from dotenv import load_dotenv
 
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer, CrossEncoder
+import numpy as np
+import torch
+from cachetools import TTLCache
+from pinecone.grpc import PineconeGRPC
+from sentence_transformers import CrossEncoder
+from modules.clients import get_http_async_client
+from modules.embeddings import TORCH_NUM_THREADS, device, get_embedding_model
+from modules.inference_queue import MAX_BATCH, MicroBatcher
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +27,6 @@ load_dotenv()
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX_NAME = "medi"
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
 print(f"Using device: {device}")
 
 # ============================================================
@@ -28,11 +34,9 @@ print(f"Using device: {device}")
 # ============================================================
 # Sentence transformer for converting text to embeddings
 # all-mpnet-base-v2: 768-dimensional embeddings, good for semantic similarity
-embedding_model = SentenceTransformer(
-    "sentence-transformers/all-mpnet-base-v2",
-    device=device
-)
-embedding_model.max_seq_length = 512  # Truncate long sequences
+# Same instance (and backend) as the one used to embed documents at ingest
+# Both models are loaded on first use (first /ask/), not at import: workers
+# that only serve prescription endpoints never load them
 
 # ============================================================
 # RERANKER (CROSS-ENCODER)
@@ -40,22 +44,159 @@ embedding_model.max_seq_length = 512  # Truncate long sequences
 # Cross-encoder provides more accurate relevance scoring
 # than bi-encoder (embedding model) but is slower
 # Used as second-stage to refine initial retrieval results
-reranker = CrossEncoder(
-    "cross-encoder/ms-marco-MiniLM-L-6-v2",
-    device=device
+RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Query + one 500-character chunk is ~150 tokens; capping pairs at 256
+# (instead of 512) bounds attention cost for pathological chunks without
+# truncating normal ones
+RERANKER_MAX_LENGTH = 256
+
+# "torch" (default) or "onnx": ONNX Runtime with the pre-exported graphs in
+# the model's Hugging Face repo (requires sentence-transformers[onnx], or
+# [onnx-gpu] for CUDA). int8 (AVX512-VNNI) on CPU, O4 fp16-optimized on CUDA.
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch").lower()
+RERANKER_ONNX_FILE = os.getenv(
+    "RERANKER_ONNX_FILE",
+    "onnx/model_O4.onnx" if device == "cuda" else "onnx/model_qint8_avx512_vnni.onnx"
 )
 
+
+# torch.compile the (torch backend) reranker: fused kernels via Inductor,
+# ~1.3-2x per forward. Opt-in: compiling adds tens of seconds to startup.
+# Shapes vary (micro-batch size, longest pair), so the graph is compiled
+# with dynamic shapes instead of one static (batch, seq_len).
+RERANKER_COMPILE = os.getenv("RERANKER_COMPILE", "false").lower() == "true"
+
+# Remote reranker: base URL of a Text-Embeddings-Inference server serving
+# the same model (e.g. `text-embeddings-inference --model-id
+# cross-encoder/ms-marco-MiniLM-L-6-v2`). When set, rerank() calls its
+# /rerank endpoint (continuous batching on the sidecar's GPU) and the
+# local CrossEncoder is never loaded.
+RERANKER_URL = os.getenv("RERANKER_URL", "").rstrip("/")
+
+
+def _load_reranker() -> CrossEncoder:
+    if RERANKER_BACKEND != "onnx":
+        # fp16 weights on GPU (tensor cores, half the memory traffic). CPU
+        # stays fp32: bf16 is only faster with AVX512-BF16/AMX, and the
+        # onnx int8 graph is the CPU fast path.
+        model = CrossEncoder(
+            RERANKER_MODEL_NAME,
+            device=device,
+            max_length=RERANKER_MAX_LENGTH,
+            model_kwargs={"torch_dtype": torch.float16} if device == "cuda" else {}
+        )
+        if RERANKER_COMPILE:
+            model.model.forward = torch.compile(model.model.forward, dynamic=True)
+            # Warm-up: pay the compile while loading, not on the first scoring call
+            with torch.inference_mode():
+                model.predict([("warm-up query", "warm-up passage")] * 7, show_progress_bar=False)
+        return model
+
+    import onnxruntime as ort
+
+    # One ORT session per process: half of this worker's share of the
+    # cores (see TORCH_NUM_THREADS), the rest for the event loop, embedding
+    # model and tokenization
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = max(1, TORCH_NUM_THREADS // 2)
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return CrossEncoder(
+        RERANKER_MODEL_NAME,
+        device=device,
+        max_length=RERANKER_MAX_LENGTH,
+        backend="onnx",
+        model_kwargs={
+            "file_name": RERANKER_ONNX_FILE,
+            "provider": "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider",
+            "session_options": session_options
+        }
+    )
+
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> CrossEncoder:
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                _reranker = _load_reranker()
+    return _reranker
+
+# ============================================================
+# MICRO-BATCHING
+# ============================================================
+# Queries / pairs from concurrent requests share one model call
+def _encode_queries(queries: List[str]):
+    # Normalized, like the ingested vectors: the index's dotproduct
+    # metric is then cosine similarity (see load_vectorstore.py)
+    return get_embedding_model().encode(
+        queries,
+        batch_size=MAX_BATCH,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+
+
+def _score_pair_lists(pair_lists: List[List[tuple]]) -> List[List[float]]:
+    # Flatten every request's pairs into one predict() call, then split back
+    all_pairs = [pair for pairs in pair_lists for pair in pairs]
+    with torch.inference_mode():
+        scores = get_reranker().predict(all_pairs, batch_size=64, show_progress_bar=False)
+
+    results, start = [], 0
+    for pairs in pair_lists:
+        results.append(scores[start:start + len(pairs)])
+        start += len(pairs)
+    return results
+
+
+embed_queue = MicroBatcher(_encode_queries)
+rerank_queue = MicroBatcher(_score_pair_lists)
+
+# ============================================================
+# QUERY EMBEDDING CACHE
+# ============================================================
+# Repeat questions skip the embedding forward pass entirely.
+# Keyed by the exact (whitespace-trimmed) query text; one model per process,
+# so the text alone identifies the vector.
+QUERY_CACHE_MAXSIZE = 10_000
+QUERY_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+query_embedding_cache = TTLCache(maxsize=QUERY_CACHE_MAXSIZE, ttl=QUERY_CACHE_TTL_SECONDS)
+
+
+async def cached_encode(query: str):
+    """Embed one query, serving repeats from query_embedding_cache."""
+    key = query.strip()
+    try:
+        return query_embedding_cache[key]
+    except KeyError:
+        pass
+
+    query_embedding = await embed_queue.submit(key)
+    query_embedding_cache[key] = query_embedding
+    return query_embedding
+
+
 # ============================================================
 # PINECONE INITIALIZATION
 # ============================================================
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# gRPC data plane (same client as load_vectorstore.py): one long-lived
+# HTTP/2 channel, protobuf instead of JSON for every query
+pc = PineconeGRPC(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX_NAME)
 
 
 # ============================================================
 # STEP 1: DENSE RETRIEVAL
 # ============================================================
-def dense_retrieval(query: str, top_k: int = 7, namespace: str = "default") -> List[Dict]:
+async def dense_retrieval(query: str, top_k: int = 7, namespace: str = "default") -> List[Dict]:
     """
     Retrieve documents using vector similarity search.
 
@@ -72,28 +213,31 @@ def dense_retrieval(query: str, top_k: int = 7, namespace: str = "default") -> L
         2. Query Pinecone for top_k most similar vectors
         3. Return documents with similarity scores
     """
-    # Embed query
-    query_embedding = embedding_model.encode(
-        query,
-        convert_to_numpy=True,
-        normalize_embeddings=True
-    )
-
-    # Query Pinecone
-    results = index.query(
-        vector=query_embedding.tolist(),
+    # Embed query (cached; misses are batched with concurrent requests)
+    query_embedding = (await cached_encode(query)).astype(np.float32, copy=False)
+
+    # Query Pinecone (in a worker thread: while this request waits on the
+    # network, the event loop keeps feeding other requests' batches to the
+    # embedding model and reranker)
+    # The gRPC client serializes the float32 array straight into the
+    # protobuf request (no list of 768 Python floats)
+    results = await asyncio.to_thread(
+        index.query,
+        vector=query_embedding,
         top_k=top_k,
         namespace=namespace,
-        include_metadata=True
+        include_metadata=True,
+        include_values=False  # don't ship 768 floats per match back
     )
 
-    # Extract documents
+    # Extract documents ("text" and "metadata" reference the match's
+    # metadata, nothing is copied)
     documents = []
-    for match in results['matches']:
+    for match in results.matches:
         documents.append({
-            "text": match["metadata"]["text"],
-            "score": match["score"],
-            "metadata": match["metadata"]
+            "text": match.metadata["text"],
+            "score": match.score,
+            "metadata": match.metadata
         })
 
     return documents
@@ -102,7 +246,22 @@ def dense_retrieval(query: str, top_k: int = 7, namespace: str = "default") -> L
 # ============================================================
 # STEP 2: RERANKING
 # ============================================================
-def rerank(query: str, documents: List[Dict], top_n: int = 4) -> List[Dict]:
+async def _remote_scores(query: str, texts: List[str]) -> np.ndarray:
+    """Score (query, text) pairs on the TEI sidecar, aligned with ``texts``."""
+    response = await get_http_async_client().post(
+        f"{RERANKER_URL}/rerank",
+        # raw_scores: logits, same scale as the local CrossEncoder.predict
+        json={"query": query, "texts": texts, "raw_scores": True}
+    )
+    response.raise_for_status()
+
+    scores = np.empty(len(texts), dtype=np.float32)
+    for item in response.json():
+        scores[item["index"]] = item["score"]
+    return scores
+
+
+async def rerank(query: str, documents: List[Dict], top_n: int = 4) -> List[Dict]:
     """
     Rerank documents using cross-encoder for better relevance.
 
@@ -122,25 +281,39 @@ def rerank(query: str, documents: List[Dict], top_n: int = 4) -> List[Dict]:
     if not documents:
         return []
 
+    # Drop exact-duplicate chunks (e.g. the same PDF uploaded twice): keep
+    # the first, highest dense-score copy, and don't score the rest
+    seen = set()
+    documents = [
+        doc for doc in documents
+        if doc["text"] not in seen and not seen.add(doc["text"])
+    ]
+
     # Create query-document pairs
     pairs = [(query, doc["text"]) for doc in documents]
 
-    # Get relevance scores from cross-encoder
-    scores = reranker.predict(pairs)
+    # Get relevance scores from cross-encoder (batched with concurrent
+    # requests, locally or by the remote TEI server)
+    if RERANKER_URL:
+        scores = await _remote_scores(query, [doc["text"] for doc in documents])
+    else:
+        scores = np.asarray(await rerank_queue.submit(pairs), dtype=np.float32)
 
-    # Add rerank scores to documents
-    for doc, score in zip(documents, scores):
-        doc["rerank_score"] = float(score)
+    # Top-n by rerank score: O(n) partial selection, then sort only the top_n
+    if len(scores) <= top_n:
+        top_idx = np.argsort(-scores)
+    else:
+        top_idx = np.argpartition(-scores, top_n)[:top_n]
+        top_idx = top_idx[np.argsort(-scores[top_idx])]
 
-    # Sort by rerank score and return top_n
-    documents = sorted(documents, key=lambda x: x["rerank_score"], reverse=True)
-    return documents[:top_n]
+    # New dicts with the rerank score (the input documents are not mutated)
+    return [dict(documents[i], rerank_score=float(scores[i])) for i in top_idx]
 
 
 # ============================================================
 # COMBINED RETRIEVAL PIPELINE
 # ============================================================
-def retrieve_with_rerank(
+async def retrieve_with_rerank(
     query: str,
     namespace: str,
     initial_k: int = 7,
@@ -163,14 +336,14 @@ def retrieve_with_rerank(
         2. Reranking: Precise cross-encoder scoring to get top 4
     """
     # Step 1: Dense Retrieval
-    initial_docs = dense_retrieval(
+    initial_docs = await dense_retrieval(
         query=query,
         namespace=namespace,
         top_k=initial_k
     )
 
     # Step 2: Rerank
-    final_docs = rerank(
+    final_docs = await rerank(
         query=query,
         documents=initial_docs,
         top_n=final_k
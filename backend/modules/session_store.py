@@ -1,19 +1,96 @@
-# Simple in-memory store (per server instance)
-# Stores prescription data, interactions, and confidence per session
+# Session store for prescription data, interactions, and confidence per session
+#
+# Default: simple in-memory store (per server instance).
+# With REDIS_URL set, sessions live in Redis instead, so every uvicorn
+# worker / replica sees the same sessions (requires the `redis` package).
+# Redis values are MessagePack-encoded (msgspec), expiring after
+# SESSION_TTL_SECONDS.
+#
+# The same Redis also holds a version counter per Pinecone namespace,
+# bumped when its documents change: the answer cache (query_handlers.py)
+# keys on it, so an upload handled by one worker invalidates every worker.
+
+import os
+
+import msgspec
+from modules.medical_api import ApiResult
+
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_SECONDS = 60 * 60
+SESSION_KEY_PREFIX = "sess:"
+NAMESPACE_VERSION_PREFIX = "nsver:"
 
 SESSION_STORE = {}
 
 
-def save_session(session_id: str, prescription_json: dict,
+class _SessionRecord(msgspec.Struct):
+    prescription: dict
+    interactions: dict | None = None
+    confidence: dict | None = None
+    api_results: list[ApiResult] = []
+
+
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder(_SessionRecord)
+
+if REDIS_URL:
+    # asyncio client: lookups are awaited, never blocking the event loop
+    import redis.asyncio as redis
+
+    redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=False)
+else:
+    redis_client = None
+
+
+async def aclose_redis_client():
+    """Close the Redis connection pool (called from the FastAPI lifespan)."""
+    if redis_client is not None:
+        await redis_client.aclose()
+
+
+async def save_session(session_id: str, prescription_json: dict,
                  interactions: dict = None, confidence: dict = None,
                  api_results: list = None):
-    SESSION_STORE[session_id] = {
+    session = {
         "prescription": prescription_json,
         "interactions": interactions,
         "confidence": confidence,
         "api_results": api_results or []
     }
 
+    if redis_client is None:
+        SESSION_STORE[session_id] = session
+        return
+
+    await redis_client.setex(
+        SESSION_KEY_PREFIX + session_id,
+        SESSION_TTL_SECONDS,
+        _encoder.encode(_SessionRecord(**session))
+    )
+
+
+async def get_session(session_id: str):
+    if redis_client is None:
+        return SESSION_STORE.get(session_id)
+
+    raw = await redis_client.get(SESSION_KEY_PREFIX + session_id)
+    if raw is None:
+        return None
+
+    # Typed decode: api_results come back as ApiResult structs
+    return msgspec.structs.asdict(_decoder.decode(raw))
+
+
+async def get_namespace_version(namespace: str) -> int:
+    """Current document version of a namespace (always 0 without Redis)."""
+    if redis_client is None:
+        return 0
+
+    raw = await redis_client.get(NAMESPACE_VERSION_PREFIX + namespace)
+    return int(raw) if raw is not None else 0
+
 
-def get_session(session_id: str):
-    return SESSION_STORE.get(session_id)
+async def bump_namespace_version(namespace: str):
+    """Mark a namespace's documents as changed, for every worker (no-op without Redis)."""
+    if redis_client is not None:
+        await redis_client.incr(NAMESPACE_VERSION_PREFIX + namespace)
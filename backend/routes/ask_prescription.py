@@ -1,7 +1,12 @@
+from typing import List
 from fastapi import APIRouter, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from modules.session_store import get_session
-from modules.api_answer_chain import generate_api_answer
+from modules.api_answer_chain import (
+    generate_api_answer,
+    generate_api_answer_batch,
+    stream_api_answer,
+)
 from modules.evaluation import detect_hallucinations
 
 router = APIRouter()
@@ -13,7 +18,7 @@ async def ask_prescription(
     question: str = Form(...)
 ):
     try:
-        session = get_session(session_id)
+        session = await get_session(session_id)
 
         if not session:
             return JSONResponse(
@@ -26,11 +31,11 @@ async def ask_prescription(
         confidence = session.get("confidence", {})
 
         # Generate answer
-        answer = generate_api_answer(prescription_json, question)
+        answer = await generate_api_answer(prescription_json, question, api_results)
 
         # Hallucination detection runs AFTER answer generation
         # Does not modify answer, only flags risk
-        hallucination_check = detect_hallucinations(
+        hallucination_check = await detect_hallucinations(
             answer, prescription_json, api_results
         )
 
@@ -45,3 +50,77 @@ async def ask_prescription(
             status_code=500,
             content={"error": str(e)}
         )
+
+
+
+@router.post("/ask_prescription_batch/")
+async def ask_prescription_batch(
+    session_id: str = Form(...),
+    questions: List[str] = Form(...)
+):
+    """
+    Answer several questions about one prescription with a single LLM call.
+    Hallucination detection runs once over all answers combined.
+    """
+    try:
+        session = await get_session(session_id)
+
+        if not session:
+            return JSONResponse(
+                status_code=404,
+                content={"error": "Invalid session_id"}
+            )
+
+        prescription_json = session["prescription"]
+        api_results = session.get("api_results", [])
+        confidence = session.get("confidence", {})
+
+        answers = await generate_api_answer_batch(prescription_json, questions, api_results)
+
+        combined_answer = "\n\n".join(
+            f"Q: {q}\nA: {a}" for q, a in zip(questions, answers)
+        )
+        hallucination_check = await detect_hallucinations(
+            combined_answer, prescription_json, api_results
+        )
+
+        return {
+            "answers": [
+                {"question": q, "answer": a}
+                for q, a in zip(questions, answers)
+            ],
+            "hallucination_check": hallucination_check,
+            "confidence": confidence
+        }
+
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": str(e)}
+        )
+
+
+@router.post("/ask_prescription_stream/")
+async def ask_prescription_stream(
+    session_id: str = Form(...),
+    question: str = Form(...)
+):
+    """
+    Stream the answer as plain text while it is generated.
+    No hallucination check: it needs the complete answer (use
+    /ask_prescription/ for the checked JSON response).
+    """
+    session = await get_session(session_id)
+
+    if not session:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Invalid session_id"}
+        )
+
+    return StreamingResponse(
+        stream_api_answer(
+            session["prescription"], question, session.get("api_results", [])
+        ),
+        media_type="text/plain; charset=utf-8"
+    )
@@ -3,9 +3,10 @@ Ask Question Route: Endpoint for querying the RAG system
 Accepts questions and returns AI-generated answers with sources
 """
 
+import orjson
 from fastapi import APIRouter, Form
-from fastapi.responses import JSONResponse
-from modules.query_handlers import query_chain
+from fastapi.responses import JSONResponse, StreamingResponse
+from modules.query_handlers import query_chain, stream_query_chain
 from logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -36,9 +37,9 @@ async def ask_question(question: str = Form(...), namespace: str = Form(...)):
         }
     """
     try:
-        logger.info(f"User query: {question}")
+        logger.info("User query: %s", question)
 
-        result = query_chain(
+        result = await query_chain(
             user_input=question,
             namespace=namespace
         )
@@ -52,3 +53,42 @@ async def ask_question(question: str = Form(...), namespace: str = Form(...)):
             status_code=500,
             content={"error": "Internal Server Error"}
         )
+
+
+def _sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _stream_events(question: str, namespace: str):
+    try:
+        async for event, data in stream_query_chain(
+            user_input=question,
+            namespace=namespace
+        ):
+            if event == "token":
+                yield _sse_event("token", {"text": data})
+            else:
+                yield _sse_event("done", {"source": data})
+    except Exception:
+        # Headers are already sent: report the failure as a final event
+        logger.exception("Error streaming answer")
+        yield _sse_event("error", {"error": "Internal Server Error"})
+
+
+@router.post("/ask_stream/")
+async def ask_question_stream(question: str = Form(...), namespace: str = Form(...)):
+    """
+    Same pipeline as /ask/, streamed as Server-Sent Events.
+
+    Events:
+        event: token  data: {"text": "partial answer"}   (repeated)
+        event: done   data: {"source": ["source_file_1.pdf", ...]}
+        event: error  data: {"error": "Internal Server Error"}
+    """
+    logger.info("User query (stream): %s", question)
+
+    return StreamingResponse(
+        _stream_events(question, namespace),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
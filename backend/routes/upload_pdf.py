@@ -6,6 +6,7 @@ Handles file upload -> parsing -> chunking -> embedding -> vector storage
 from fastapi import APIRouter, UploadFile, File
 from typing import List
 from modules.load_vectorstore import load_vectorstore_async
+from modules.query_handlers import invalidate_namespace
 from fastapi.responses import JSONResponse
 from logger import setup_logger
 
@@ -50,6 +51,8 @@ async def upload_pdfs(files: List[UploadFile] = File(...), namespace: str = "def
     try:
         logger.info("Received uploaded files")
         result = await load_vectorstore_async(files, namespace)
+        # Cached answers for this namespace predate the new documents
+        await invalidate_namespace(namespace)
         logger.info("Documents added to vectorstore")
         return {
             "message": "Files processed and vectorstore updated",
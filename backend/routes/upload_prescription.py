@@ -31,14 +31,17 @@ async def upload_prescription(file: UploadFile = File(...)):
         structured_json = parse_prescription(ocr_text)
 
         # Interaction + confidence scoring (performed once at upload stage)
-        confidence, api_results = compute_confidence(structured_json)
-        interactions = check_interactions(structured_json.get("medications", []))
+        # The interaction checker reuses the RxNorm IDs resolved while scoring
+        confidence, api_results = await compute_confidence(structured_json)
+        interactions = await check_interactions(
+            structured_json.get("medications", []), api_results
+        )
 
         # Create session ID
         session_id = str(uuid.uuid4())
 
         # Store session with all computed data
-        save_session(
+        await save_session(
             session_id,
             structured_json,
             interactions=interactions,
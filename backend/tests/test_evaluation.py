@@ -10,8 +10,12 @@ Usage:
 
 import sys
 import os
+import asyncio
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from dotenv import load_dotenv
+load_dotenv()
+
 from modules.evaluation import compute_parsing_f1, compute_grounding_coverage
 from modules.confidence_scorer import compute_confidence
 
@@ -93,7 +97,7 @@ SAMPLE_PRESCRIPTIONS = [
 # Run Evaluation
 # ==============================
 
-def run_evaluation():
+async def run_evaluation():
     print("=" * 70)
     print("  PRESCRIPTION PIPELINE EVALUATION")
     print("=" * 70)
@@ -112,7 +116,7 @@ def run_evaluation():
 
         # Confidence (makes live API calls)
         try:
-            confidence, api_results = compute_confidence(sample["parsed"])
+            confidence, api_results = await compute_confidence(sample["parsed"])
             grounding = compute_grounding_coverage(api_results)
 
             print(f"  Diagnosis:       {confidence['diagnosis_confidence']} "
@@ -164,5 +168,32 @@ def run_evaluation():
     print()
 
 
+# ==============================
+# Edge Cases
+# ==============================
+
+async def run_edge_cases():
+    print("=" * 70)
+    print("  EDGE CASES")
+    print("=" * 70)
+
+    # The parser emits "name": null for a drug it could not read
+    parsed = {
+        "diagnosis": "HTN",
+        "medications": [
+            {"name": None, "dose": "5 mg", "frequency": "Once daily"},
+            {"name": "Amlodipine", "dose": "5 mg", "frequency": "Once daily"},
+        ]
+    }
+    try:
+        confidence, api_results = await compute_confidence(parsed)
+        names = [m["name"] for m in confidence["medication_scores"]]
+        print(f"  Null medication name: ✓ PASS  (scored {names})")
+    except Exception as e:
+        print(f"  Null medication name: ✗ FAIL  ({type(e).__name__}: {e})")
+    print()
+
+
 if __name__ == "__main__":
-    run_evaluation()
+    asyncio.run(run_evaluation())
+    asyncio.run(run_edge_cases())
@@ -33,8 +33,8 @@ try:
         print(f"  cuDNN enabled        : {torch.backends.cudnn.enabled}")
         print(f"  cuDNN version        : {torch.backends.cudnn.version()}")
 
-        # Quick tensor test on GPU
-        t = torch.tensor([1.0, 2.0, 3.0]).cuda()
+        # Quick tensor test on GPU (allocated on the device: no host copy)
+        t = torch.zeros(3, device="cuda")
         print(f"  GPU tensor test      : {PASS}  (tensor on {t.device})")
     else:
         print(f"  {FAIL}  CUDA is NOT available!")
@@ -57,15 +57,12 @@ except Exception as e:
 divider("2. SentenceTransformer (Embedding Model)")
 
 try:
-    from sentence_transformers import SentenceTransformer
+    # Same loader (model, device, backend) the app uses
+    from modules.embeddings import device, get_embedding_model
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
     print(f"  Loading on device    : {device}")
 
-    model = SentenceTransformer(
-        "sentence-transformers/all-mpnet-base-v2",
-        device=device
-    )
+    model = get_embedding_model()
 
     # Check which device the model is actually on
     actual_device = str(next(model.parameters()).device)
@@ -19,34 +19,45 @@ Run:
 import os
 import sys
 import json
+import asyncio
+import hashlib
+import multiprocessing
 import re
 import unicodedata
+from contextlib import aclosing
 from pathlib import Path
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional
 
+import diskcache
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 
-load_dotenv()
-
 # ── path setup ──────────────────────────────────────────────
 TESTS_DIR = Path(__file__).resolve().parent
 BACKEND_DIR = TESTS_DIR.parent
 sys.path.insert(0, str(BACKEND_DIR))
 
-from modules.ocr import extract_text_from_image  # noqa: E402
-
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
 # ── Groq client (langchain) ────────────────────────────────
-from langchain_groq import ChatGroq  # noqa: E402
 from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
 
-evaluator_llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="openai/gpt-oss-120b",
-    temperature=0,
-)
+EVALUATOR_MODEL = "openai/gpt-oss-120b"
+
+
+@lru_cache(maxsize=1)
+def get_evaluator_llm():
+    """
+    Shared, memoized gpt-oss-120b instance (pooled HTTP/2 client), created
+    on first use: the spawned metrics workers re-import this module and
+    must not read .env or build an LLM client.
+    """
+    from modules.clients import get_llm
+
+    load_dotenv()
+    return get_llm(model=EVALUATOR_MODEL)
 
 
 # =====================================================
@@ -220,12 +231,21 @@ GROUND_TRUTH: Dict[str, dict] = {
 # 2.  TEXT NORMALISATION HELPERS
 # =====================================================
 
+_RE_KEEP_PUNCT = re.compile(r"[^\w\s.,;:/()\-]")
+_RE_WS = re.compile(r"\s+")
+_RE_NUM = re.compile(r"[\d.]+")
+_RE_JSON_OBJECT = re.compile(r"\{[\s\S]*\}")
+
+
+# Every metric normalises the same OCR output and reference strings again;
+# cached, each distinct string is normalised once per run
+@lru_cache(maxsize=8192)
 def normalise(text: str) -> str:
     """Lower-case, collapse whitespace, strip accents / special chars."""
     text = unicodedata.normalize("NFKD", text)
     text = text.lower().strip()
-    text = re.sub(r"[^\w\s.,;:/()\-]", "", text)  # keep basic punctuation
-    text = re.sub(r"\s+", " ", text)
+    text = _RE_KEEP_PUNCT.sub("", text)  # keep basic punctuation
+    text = _RE_WS.sub(" ", text)
     return text
 
 
@@ -233,12 +253,49 @@ def tokenise(text: str) -> List[str]:
     return normalise(text).split()
 
 
+def _dose_numbers(doses: List[str]) -> List[str]:
+    """First number in each dose that has one."""
+    return [m.group() for m in map(_RE_NUM.search, doses) if m]
+
+
+def _ref_line_words(ref_text: str) -> List[List[str]]:
+    """Normalised words of each non-empty reference line."""
+    return [normalise(l).split() for l in ref_text.strip().splitlines() if l.strip()]
+
+
+# Ground truth is constant: normalise its items and reference lines (and
+# serialize the structured fields for the LLM prompt) once, here, instead
+# of in every metric call for every engine
+for _gt in GROUND_TRUTH.values():
+    _gt["_structured_json"] = json.dumps(_gt["structured"], indent=2)
+    _gt["_norm"] = {
+        "drugs": [normalise(d) for d in _gt["drugs"]],
+        "doses": [normalise(d) for d in _gt["doses"]],
+        "dates": [normalise(d) for d in _gt["dates"]],
+        # Numeric part of each dose ("15" from "15 mL"), for numeric_dosage_accuracy
+        "dose_nums": _dose_numbers(_gt["doses"]),
+        "ref_lines": _ref_line_words(_gt["reference_text"]),
+        # CER / WER denominators, for corpus-level rates in the summary
+        "ref_chars": len(normalise(_gt["reference_text"])),
+        "ref_words": len(tokenise(_gt["reference_text"])),
+    }
+
+
 # =====================================================
 # 3.  METRIC COMPUTATION (text-level)
 # =====================================================
 
-def _levenshtein(a: str, b: str) -> int:
-    """Character-level Levenshtein distance."""
+# RapidFuzz (optional): C++ (bit-parallel) Levenshtein, used for CER and
+# for recall_set's similarity matrix when installed
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    process = Levenshtein = None
+
+
+def _lev_python(a, b) -> int:
+    """Levenshtein distance over two sequences (pure-Python DP, one row)."""
     n, m = len(a), len(b)
     dp = list(range(m + 1))
     for i in range(1, n + 1):
@@ -253,6 +310,108 @@ def _levenshtein(a: str, b: str) -> int:
     return dp[m]
 
 
+def _myers(a: str, b: str) -> int:
+    """
+    Levenshtein distance with Myers' bit-parallel algorithm (Hyyrö's
+    formulation): one column of the DP matrix per character of ``a``,
+    updated with a handful of bitwise ops on ``len(b)``-bit masks.
+    Meant for short patterns (len(b) <= 64).
+    """
+    m = len(b)
+    if not m:
+        return len(a)
+
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    vp, vn, score = mask, 0, m
+    for ch in a:
+        eq = peq.get(ch, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        hp = vn | ~(xh | vp)
+        hn = vp & xh
+        if hp & high:
+            score += 1
+        elif hn & high:
+            score -= 1
+        hp = (hp << 1) | 1
+        hn <<= 1
+        vp = (hn | ~(xv | hp)) & mask
+        vn = hp & xv & mask
+    return score
+
+
+def _codepoints(s: str) -> np.ndarray:
+    """One uint32 per character (UTF-32), so distances stay per character."""
+    return np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32)
+
+
+def _ascii_bytes(s: str) -> np.ndarray:
+    """One uint8 per character: only valid when ``s.isascii()``."""
+    return np.frombuffer(s.encode("ascii"), dtype=np.uint8)
+
+
+# Same recurrence compiled to machine code with Numba (optional dependency);
+# falls back to the pure-Python loop when numba isn't installed.
+# Only needed without rapidfuzz: with it, numba isn't imported and nothing
+# is compiled or loaded from the JIT cache (here and in every metrics
+# worker process).
+_lev_numba = None
+if Levenshtein is None:
+    try:
+        from numba import njit
+    except ImportError:
+        njit = None
+
+    if njit is not None:
+        @njit(cache=True)
+        def _lev_numba(a, b):
+            n, m = a.shape[0], b.shape[0]
+            dp = np.empty(m + 1, dtype=np.int32)
+            for j in range(m + 1):
+                dp[j] = j
+            for i in range(1, n + 1):
+                prev = dp[0]
+                dp[0] = i
+                for j in range(1, m + 1):
+                    cost = 0 if a[i - 1] == b[j - 1] else 1
+                    best = min(dp[j] + 1, dp[j - 1] + 1, prev + cost)
+                    prev = dp[j]
+                    dp[j] = best
+            return dp[m]
+
+        # Compile once at import, for the exact array types passed later,
+        # so JIT time isn't counted in the first metric (later runs load
+        # them from the cache=True disk cache): read-only uint8 / uint32
+        # (_ascii_bytes / _codepoints buffers), writable uint32 (token ids)
+        _lev_numba(_ascii_bytes(" "), _ascii_bytes(" "))
+        _lev_numba(_codepoints(" "), _codepoints(" "))
+        _lev_numba(np.zeros(1, np.uint32), np.zeros(1, np.uint32))
+
+
+def _levenshtein(a: str, b: str) -> int:
+    """Character-level Levenshtein distance."""
+    if Levenshtein is not None:
+        return Levenshtein.distance(a, b)
+    if _lev_numba is None:
+        # Drug names, doses and dates fit one 64-bit mask: bit-parallel
+        # Myers instead of the O(n*m) Python DP
+        if len(a) < len(b):
+            a, b = b, a
+        if len(b) <= 64:
+            return _myers(a, b)
+        return _lev_python(a, b)
+    # Normalised OCR / reference text is nearly always ASCII: one byte per
+    # character (a quarter of the UTF-32 buffers) gives the same distance
+    if a.isascii() and b.isascii():
+        return int(_lev_numba(_ascii_bytes(a), _ascii_bytes(b)))
+    return int(_lev_numba(_codepoints(a), _codepoints(b)))
+
+
 def compute_cer(ocr: str, ref: str) -> float:
     """Character Error Rate = edit_distance / len(reference)."""
     a, b = normalise(ocr), normalise(ref)
@@ -267,23 +426,22 @@ def compute_wer(ocr: str, ref: str) -> float:
     ref_tokens = tokenise(ref)
     if not ref_tokens:
         return 0.0
-    return _levenshtein(" ".join(hyp_tokens), " ".join(ref_tokens)) / len(" ".join(ref_tokens))
+    return _word_level_levenshtein(hyp_tokens, ref_tokens) / len(ref_tokens)
 
 
 def _word_level_levenshtein(a: List[str], b: List[str]) -> int:
     """Word-level Levenshtein distance."""
-    n, m = len(a), len(b)
-    dp = list(range(m + 1))
-    for i in range(1, n + 1):
-        prev, dp[0] = dp[0], i
-        for j in range(1, m + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            ins = dp[j] + 1
-            dele = dp[j - 1] + 1
-            sub = prev + cost
-            prev = dp[j]
-            dp[j] = min(ins, dele, sub)
-    return dp[m]
+    if Levenshtein is not None:
+        return Levenshtein.distance(a, b)  # any sequences of hashables
+    if _lev_numba is None:
+        return _lev_python(a, b)
+    # Numba can't compare Python strings: map each distinct token to an
+    # integer id. uint32, like _codepoints(), so the kernel compiled at
+    # import is reused instead of compiling another specialization.
+    vocab = {token: i for i, token in enumerate(set(a) | set(b))}
+    ids_a = np.fromiter((vocab[t] for t in a), dtype=np.uint32, count=len(a))
+    ids_b = np.fromiter((vocab[t] for t in b), dtype=np.uint32, count=len(b))
+    return int(_lev_numba(ids_a, ids_b))
 
 
 def compute_wer_proper(ocr: str, ref: str) -> float:
@@ -301,7 +459,11 @@ def compute_wer_proper(ocr: str, ref: str) -> float:
 
 def _fuzzy_match(candidate: str, reference: str, threshold: float = 0.6) -> bool:
     """Return True if normalised candidate is close enough to reference."""
-    c, r = normalise(candidate), normalise(reference)
+    return _fuzzy_match_prenorm(normalise(candidate), normalise(reference), threshold)
+
+
+def _fuzzy_match_prenorm(c: str, r: str, threshold: float = 0.6) -> bool:
+    """_fuzzy_match on already-normalised strings."""
     if r in c or c in r:
         return True
     dist = _levenshtein(c, r)
@@ -309,39 +471,62 @@ def _fuzzy_match(candidate: str, reference: str, threshold: float = 0.6) -> bool
     return (1 - dist / max_len) >= threshold
 
 
-def recall_set(ocr_text: str, ground_items: List[str]) -> float:
-    """Fraction of ground-truth items found (fuzzy) in OCR text."""
+def recall_set(ocr_text: str, ground_items: List[str],
+               items_norm: Optional[List[str]] = None) -> float:
+    """
+    Fraction of ground-truth items found (fuzzy) in OCR text.
+    ``items_norm``: the items already normalised (see GROUND_TRUTH "_norm").
+    """
     if not ground_items:
         return 1.0  # nothing to find → perfect
-    found = sum(1 for item in ground_items if _fuzzy_match(ocr_text, item))
+    ocr_norm = normalise(ocr_text)
+    if not ocr_norm:
+        return 0.0  # "" is a substring of every item: it must not count as found
+    if items_norm is None:
+        items_norm = [normalise(item) for item in ground_items]
+    if process is None:
+        found = sum(1 for r in items_norm if _fuzzy_match_prenorm(ocr_norm, r))
+        return found / len(ground_items)
+
+    # One cdist call for all items; similarity = 1 - distance / max_len,
+    # as in _fuzzy_match_prenorm
+    similarity = process.cdist([ocr_norm], items_norm, scorer=Levenshtein.normalized_similarity)[0]
+    found = sum(
+        1 for r, sim in zip(items_norm, similarity)
+        if r in ocr_norm or ocr_norm in r or sim >= 0.6
+    )
     return found / len(ground_items)
 
 
-def drug_extraction_accuracy(ocr_text: str, drugs: List[str]) -> float:
-    return recall_set(ocr_text, drugs)
+def drug_extraction_accuracy(ocr_text: str, drugs: List[str],
+                             drugs_norm: Optional[List[str]] = None) -> float:
+    return recall_set(ocr_text, drugs, drugs_norm)
 
 
-def dose_extraction_accuracy(ocr_text: str, doses: List[str]) -> float:
-    return recall_set(ocr_text, doses)
+def dose_extraction_accuracy(ocr_text: str, doses: List[str],
+                             doses_norm: Optional[List[str]] = None) -> float:
+    return recall_set(ocr_text, doses, doses_norm)
 
 
-def date_extraction_accuracy(ocr_text: str, dates: List[str]) -> float:
-    return recall_set(ocr_text, dates)
+def date_extraction_accuracy(ocr_text: str, dates: List[str],
+                             dates_norm: Optional[List[str]] = None) -> float:
+    return recall_set(ocr_text, dates, dates_norm)
 
 
-def medication_detection_recall(ocr_text: str, drugs: List[str]) -> float:
-    return drug_extraction_accuracy(ocr_text, drugs)
+def medication_detection_recall(ocr_text: str, drugs: List[str],
+                                drugs_norm: Optional[List[str]] = None) -> float:
+    return drug_extraction_accuracy(ocr_text, drugs, drugs_norm)
 
 
-def numeric_dosage_accuracy(ocr_text: str, doses: List[str]) -> float:
-    """Check numeric part of doses (e.g. '15' from '15 mL')."""
+def numeric_dosage_accuracy(ocr_text: str, doses: List[str],
+                            dose_nums: Optional[List[str]] = None) -> float:
+    """
+    Check numeric part of doses (e.g. '15' from '15 mL').
+    ``dose_nums``: those numbers, precomputed (GROUND_TRUTH "_norm").
+    """
     if not doses:
         return 1.0
-    nums = []
-    for d in doses:
-        m = re.search(r"[\d.]+", d)
-        if m:
-            nums.append(m.group())
+    nums = _dose_numbers(doses) if dose_nums is None else dose_nums
     if not nums:
         return 1.0
     found = sum(1 for n in nums if n in ocr_text)
@@ -352,23 +537,27 @@ def numeric_dosage_accuracy(ocr_text: str, doses: List[str]) -> float:
 # 5.  LAYOUT PRESERVATION (heuristic line-based)
 # =====================================================
 
-def layout_preservation_score(ocr_text: str, ref_text: str) -> float:
+def layout_preservation_score(ocr_text: str, ref_text: str,
+                              ref_lines: Optional[List[List[str]]] = None) -> float:
     """
     Heuristic: fraction of reference lines whose key content appears
     in the OCR output (order-aware, normalised).
+    ``ref_lines``: words per reference line, precomputed (GROUND_TRUTH "_norm").
     """
-    ref_lines = [normalise(l) for l in ref_text.strip().splitlines() if l.strip()]
+    if ref_lines is None:
+        ref_lines = _ref_line_words(ref_text)
     if not ref_lines:
         return 1.0
-    ocr_norm = normalise(ocr_text)
+    # Whole-word lookups: O(1) per word instead of a substring scan of the
+    # OCR text (which also counted e.g. "5" as found inside "15")
+    ocr_tokens = set(normalise(ocr_text).split())
     found = 0
-    for line in ref_lines:
+    for words in ref_lines:
         # check if most words of the line appear in OCR
-        words = line.split()
         if not words:
             found += 1
             continue
-        matched = sum(1 for w in words if w in ocr_norm)
+        matched = sum(1 for w in words if w in ocr_tokens)
         if matched / len(words) >= 0.5:
             found += 1
     return found / len(ref_lines)
@@ -425,19 +614,146 @@ Evaluate and return JSON only."""),
 ])
 
 
-def evaluate_structured_json_f1(ocr_text: str, gt_structured: dict) -> dict:
-    """Use Groq LLM to compute structured extraction F1."""
+# Repeat runs on unchanged OCR output skip the Groq call: parsed results
+# are stored on disk, keyed on the evaluator model + the full prompt (ground
+# truth, OCR text and instructions). Run with --no-cache (or delete the
+# directory) to re-evaluate; fresh results still overwrite the entries.
+EVAL_CACHE_DIR = TESTS_DIR / ".ocr_eval_cache"
+EVAL_CACHE_READ = True
+
+
+@lru_cache(maxsize=1)
+def get_eval_cache() -> diskcache.Cache:
+    """Opened on first use, in the main process only (see get_evaluator_llm)."""
+    return diskcache.Cache(str(EVAL_CACHE_DIR))
+
+# OCR results are cached by modules/ocr.py (engine + image bytes), so
+# repeat runs skip OCR; --refresh-ocr re-runs the models
+OCR_REFRESH = False
+
+
+def _eval_cache_key(prompt: str) -> str:
+    return hashlib.blake2b(
+        f"{get_evaluator_llm().model_name}\0{prompt}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+# OCR output this short is a failed read: scored as nothing extracted,
+# without asking the LLM
+MIN_EVAL_OCR_CHARS = 20
+OCR_TOO_SHORT_RESULT = {
+    "extracted_patient_name": None,
+    "extracted_prescriber": None,
+    "extracted_medications": [],
+    "patient_name_correct": False,
+    "prescriber_correct": False,
+    "med_precision": 0.0,
+    "med_recall": 0.0,
+    "med_f1": 0.0,
+    "field_level_notes": "ocr_too_short",
+}
+
+# Within a run, OCR outputs that only differ in case / spacing / accents
+# (e.g. both engines reading a clean print identically) share one result.
+# Key = (normalised OCR text, ground truth)
+_eval_memo: Dict[tuple, dict] = {}
+# Same key -> the evaluation currently running: the engines are scored
+# concurrently, so an identical sample awaits the first request instead
+# of sending its own
+_eval_inflight: Dict[tuple, asyncio.Task] = {}
+
+
+async def evaluate_structured_json_f1(ocr_text: str, gt_structured: dict,
+                                      gt_json: Optional[str] = None) -> dict:
+    """
+    Use Groq LLM to compute structured extraction F1.
+    ``gt_json``: gt_structured already serialized (GROUND_TRUTH "_structured_json").
+    """
+    if len(ocr_text.strip()) < MIN_EVAL_OCR_CHARS:
+        return dict(OCR_TOO_SHORT_RESULT)
+
+    if gt_json is None:
+        gt_json = json.dumps(gt_structured, indent=2)
+
+    memo_key = (normalise(ocr_text), gt_json)
+    if memo_key in _eval_memo:
+        return _eval_memo[memo_key]
+
+    task = _eval_inflight.get(memo_key)
+    if task is None:
+        task = asyncio.ensure_future(_request_evaluation(ocr_text, gt_json, memo_key))
+        _eval_inflight[memo_key] = task
+        task.add_done_callback(lambda _: _eval_inflight.pop(memo_key, None))
+    # shield: one caller being cancelled doesn't cancel the shared request
+    return await asyncio.shield(task)
+
+
+class _JsonObjectScanner:
+    """
+    Tracks where the first top-level JSON object of a streamed response
+    closes. Braces inside JSON strings (e.g. in "field_level_notes") are
+    not counted: string and escape state is kept across chunks.
+    """
+    __slots__ = ("depth", "in_string", "escaped")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> bool:
+        """True once the object opened by the first "{" is closed."""
+        for ch in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                # Quotes before the object (preamble text) aren't JSON strings
+                self.in_string = self.depth > 0
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return True
+        return False
+
+
+async def _request_evaluation(ocr_text: str, gt_json: str, memo_key: tuple) -> dict:
+    """Disk cache lookup, then the Groq request (see evaluate_structured_json_f1)."""
     try:
         formatted = STRUCTURED_EVAL_PROMPT.invoke({
-            "ground_truth": json.dumps(gt_structured, indent=2),
+            "ground_truth": gt_json,
             "ocr_text": ocr_text,
         })
-        response = evaluator_llm.invoke(formatted)
-        raw = response.content.strip()
+        cache_key = _eval_cache_key(formatted.to_string())
+        cached = get_eval_cache().get(cache_key) if EVAL_CACHE_READ else None
+        if cached is not None:
+            _eval_memo[memo_key] = cached
+            return cached
+
+        # Streamed: stop reading as soon as the JSON object is closed
+        # instead of waiting for the rest of the response. aclosing():
+        # breaking out closes the stream (and its HTTP response) right away
+        raw = ""
+        scanner = _JsonObjectScanner()
+        async with aclosing(get_evaluator_llm().astream(formatted)) as stream:
+            async for chunk in stream:
+                raw += chunk.content
+                if scanner.feed(chunk.content):
+                    break
+        raw = raw.strip()
         # Try to extract JSON from response
-        json_match = re.search(r"\{[\s\S]*\}", raw)
+        json_match = _RE_JSON_OBJECT.search(raw)
         if json_match:
-            return json.loads(json_match.group())
+            result = json.loads(json_match.group())
+            get_eval_cache().set(cache_key, result)
+            _eval_memo[memo_key] = result
+            return result
         return {"error": "No JSON in LLM response", "raw": raw[:500]}
     except Exception as e:
         return {"error": str(e)}
@@ -447,7 +763,7 @@ def evaluate_structured_json_f1(ocr_text: str, gt_structured: dict) -> dict:
 # 7.  RESULT DATACLASS
 # =====================================================
 
-@dataclass
+@dataclass(slots=True)  # no per-instance __dict__: one result per (engine, prescription)
 class PrescriptionResult:
     name: str
     engine: str
@@ -480,80 +796,213 @@ def divider(title: str):
     print(f"{'=' * 70}")
 
 
+# Report blocks, formatted in one str.format call each
+SAMPLE_TEMPLATE = (
+    "  CER              : {cer:.4f}\n"
+    "  WER              : {wer:.4f}\n"
+    "  Layout Score     : {layout_score:.4f}\n"
+    "  Medication Recall: {medication_recall:.4f}\n"
+    "  Numeric Dosage   : {numeric_dosage_acc:.4f}\n"
+    "  Drug Accuracy    : {drug_acc:.4f}\n"
+    "  Dose Accuracy    : {dose_acc:.4f}\n"
+    "  Date Accuracy    : {date_acc:.4f}"
+)
+
+SUMMARY_TEMPLATE = (
+    "\n  " + BOLD + "{engine}" + RESET + "  ({n} prescriptions)\n"
+    "    Avg CER              : {cer:.4f}\n"
+    "    Avg WER              : {wer:.4f}\n"
+    "    Corpus CER           : {corpus_cer:.4f}\n"
+    "    Corpus WER           : {corpus_wer:.4f}\n"
+    "    Avg Layout Score     : {layout_score:.4f}\n"
+    "    Avg Medication Recall: {medication_recall:.4f}\n"
+    "    Avg Numeric Dosage   : {numeric_dosage_acc:.4f}\n"
+    "    Avg Drug Accuracy    : {drug_acc:.4f}\n"
+    "    Avg Dose Accuracy    : {dose_acc:.4f}\n"
+    "    Avg Date Accuracy    : {date_acc:.4f}\n"
+    "    Avg Structured F1    : {structured_f1:.4f}\n"
+)
+
+
+def _score_sample(ocr_text: str, tag: str) -> Dict[str, float]:
+    """
+    Text and entity metrics of one OCR output against GROUND_TRUTH[tag]
+    (pure CPU work; runs in a metrics worker process).
+
+    Returns:
+        dict: PrescriptionResult field name -> value
+    """
+    gt = GROUND_TRUTH[tag]
+    norm = gt["_norm"]
+    return {
+        "cer": compute_cer(ocr_text, gt["reference_text"]),
+        "wer": compute_wer_proper(ocr_text, gt["reference_text"]),
+        "layout_score": layout_preservation_score(ocr_text, gt["reference_text"], norm["ref_lines"]),
+        "medication_recall": medication_detection_recall(ocr_text, gt["drugs"], norm["drugs"]),
+        "numeric_dosage_acc": numeric_dosage_accuracy(ocr_text, gt["doses"], norm["dose_nums"]),
+        "drug_acc": drug_extraction_accuracy(ocr_text, gt["drugs"], norm["drugs"]),
+        "dose_acc": dose_extraction_accuracy(ocr_text, gt["doses"], norm["doses"]),
+        "date_acc": date_extraction_accuracy(ocr_text, gt["dates"], norm["dates"]),
+    }
+
+
+def _empty_ocr_metrics(tag: str) -> Dict[str, float]:
+    """
+    _score_sample() for an empty OCR output, from the ground truth alone:
+    every reference character / word is an edit, nothing is found.
+    """
+    gt = GROUND_TRUTH[tag]
+    norm = gt["_norm"]
+    def missed(items):
+        return 0.0 if items else 1.0  # no items to find scores 1.0 (see recall_set)
+
+    ref_lines = norm["ref_lines"]
+    return {
+        "cer": 1.0 if norm["ref_chars"] else 0.0,
+        "wer": 1.0 if norm["ref_words"] else 0.0,
+        "layout_score": sum(1 for words in ref_lines if not words) / len(ref_lines) if ref_lines else 1.0,
+        "medication_recall": missed(gt["drugs"]),
+        "numeric_dosage_acc": missed(norm["dose_nums"]),
+        "drug_acc": missed(gt["drugs"]),
+        "dose_acc": missed(gt["doses"]),
+        "date_acc": missed(gt["dates"]),
+    }
+
+
+# (blake2b of the OCR text, tag) -> future of its _score_sample() result:
+# identical outputs (e.g. both engines reading a clean print the same way)
+# are scored once per run, concurrent duplicates await the same job
+_metrics_memo: Dict[tuple, asyncio.Future] = {}
+
+
+async def _text_metrics(metrics_pool: ProcessPoolExecutor, ocr_text: str,
+                        tag: str) -> Dict[str, float]:
+    """_score_sample() in the metrics pool, skipping empty and repeat outputs."""
+    if not ocr_text.strip():
+        return _empty_ocr_metrics(tag)
+
+    key = (hashlib.blake2b(ocr_text.encode("utf-8"), digest_size=16).digest(), tag)
+    job = _metrics_memo.get(key)
+    if job is None:
+        job = asyncio.get_running_loop().run_in_executor(metrics_pool, _score_sample, ocr_text, tag)
+        _metrics_memo[key] = job
+    return await job
+
+
+async def _score_and_report(metrics_pool: ProcessPoolExecutor, engine: str, tag: str,
+                            gt: dict, ocr_text: str) -> PrescriptionResult:
+    """Compute every metric for one OCR output and print its block."""
+    # Printed as one block at the end: samples finish out of order
+    lines = [
+        f"\n  ── {tag} ({os.path.basename(gt['image'])}, {engine}) ──",
+        f"  OCR length: {len(ocr_text)} chars",
+    ]
+
+    # --- Text metrics (worker process) + Structured JSON F1 via LLM ---
+    # Both at once: CPU-bound Levenshtein work runs in parallel with the
+    # network-bound Groq call (and with the other engine's OCR)
+    metrics, struct_result = await asyncio.gather(
+        _text_metrics(metrics_pool, ocr_text, tag),
+        evaluate_structured_json_f1(ocr_text, gt["structured"], gt["_structured_json"]),
+    )
+
+    lines.append(SAMPLE_TEMPLATE.format(**metrics))
+
+    struct_f1 = struct_result.get("med_f1", 0.0)
+    if isinstance(struct_f1, (int, float)):
+        pass
+    else:
+        struct_f1 = 0.0
+
+    lines.append(f"  Structured F1    : {struct_f1:.4f}")
+    if struct_result.get("field_level_notes"):
+        lines.append(f"  Notes            : {struct_result['field_level_notes'][:120]}")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+    return PrescriptionResult(
+        name=tag,
+        engine=engine,
+        **metrics,
+        structured_f1=struct_f1,
+        structured_detail=struct_result,
+        ocr_text=ocr_text[:500],
+    )
+
+
+async def _evaluate_engine(metrics_pool: ProcessPoolExecutor,
+                           engine: str) -> List[PrescriptionResult]:
+    """OCR every ground-truth image with ``engine`` in one batch, then score each."""
+    # Imported here, not at module level: metrics worker processes import
+    # this module too, and must not load torch / the OCR models
+    from modules.ocr import extract_text_from_images
+
+    samples = []
+    for tag, gt in GROUND_TRUTH.items():
+        if os.path.exists(gt["image"]):
+            samples.append((tag, gt))
+        else:
+            print(f"  {FAIL} {tag} ({engine}): image not found at {gt['image']}")
+    if not samples:
+        return []
+
+    # --- Run OCR ---
+    # One batched generate call for all images (cached ones are skipped,
+    # see modules/ocr.py, unless --refresh-ocr) instead of one call per image
+    try:
+        ocr_texts = await asyncio.to_thread(
+            extract_text_from_images, [gt["image"] for _, gt in samples],
+            engine=engine, refresh=OCR_REFRESH
+        )
+    except Exception as e:
+        print(f"  {FAIL} OCR failed ({engine}): {e}")
+        return [PrescriptionResult(name=tag, engine=engine) for tag, _ in samples]
+
+    return await asyncio.gather(*(
+        _score_and_report(metrics_pool, engine, tag, gt, ocr_text)
+        for (tag, gt), ocr_text in zip(samples, ocr_texts)
+    ))
+
+
+async def _evaluate_engines(engines: List[str]) -> List[PrescriptionResult]:
+    """
+    Evaluate every (engine, prescription) pair, overlapping the work:
+    the engines run their (batched) OCR side by side in worker threads,
+    and each engine's samples are scored as soon as its batch is done,
+    while the other engine may still be running.
+
+    Text metrics are pure-Python CPU work (GIL-bound in threads), so they
+    run in a process pool; workers are spawned (not forked from a process
+    running CUDA / OCR threads) and only import this module's helpers
+    (the evaluator LLM and its cache are created lazily, in this process).
+    OCR itself stays in this process: a worker process per image would
+    load its own copy of the OCR models onto the GPU.
+    """
+    metrics_pool = ProcessPoolExecutor(
+        max_workers=min(len(GROUND_TRUTH), os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    try:
+        per_engine = await asyncio.gather(*(
+            _evaluate_engine(metrics_pool, engine) for engine in engines
+        ))
+    finally:
+        metrics_pool.shutdown()
+    return [result for results in per_engine for result in results]
+
+
+# PrescriptionResult fields averaged in the summary (CER, WER first)
+SUMMARY_METRICS = (
+    "cer", "wer", "layout_score", "medication_recall", "numeric_dosage_acc",
+    "drug_acc", "dose_acc", "date_acc", "structured_f1",
+)
+
+
 def run_evaluation(engines: Optional[List[str]] = None):
     if engines is None:
         engines = ["lighton", "glm"]
 
-    all_results: List[PrescriptionResult] = []
-
-    for engine in engines:
-        divider(f"ENGINE: {engine.upper()}")
-
-        for tag, gt in GROUND_TRUTH.items():
-            image_path = gt["image"]
-            if not os.path.exists(image_path):
-                print(f"  {FAIL} {tag}: image not found at {image_path}")
-                continue
-
-            print(f"\n  ── {tag} ({os.path.basename(image_path)}) ──")
-
-            # --- Run OCR ---
-            try:
-                ocr_text = extract_text_from_image(image_path, engine=engine)
-            except Exception as e:
-                print(f"  {FAIL} OCR failed: {e}")
-                all_results.append(PrescriptionResult(name=tag, engine=engine))
-                continue
-
-            print(f"  OCR length: {len(ocr_text)} chars")
-
-            # --- Text metrics ---
-            cer = compute_cer(ocr_text, gt["reference_text"])
-            wer = compute_wer_proper(ocr_text, gt["reference_text"])
-            layout = layout_preservation_score(ocr_text, gt["reference_text"])
-            med_recall = medication_detection_recall(ocr_text, gt["drugs"])
-            num_dose = numeric_dosage_accuracy(ocr_text, gt["doses"])
-            drug_acc = drug_extraction_accuracy(ocr_text, gt["drugs"])
-            dose_acc = dose_extraction_accuracy(ocr_text, gt["doses"])
-            date_acc = date_extraction_accuracy(ocr_text, gt["dates"])
-
-            print(f"  CER              : {cer:.4f}")
-            print(f"  WER              : {wer:.4f}")
-            print(f"  Layout Score     : {layout:.4f}")
-            print(f"  Medication Recall: {med_recall:.4f}")
-            print(f"  Numeric Dosage   : {num_dose:.4f}")
-            print(f"  Drug Accuracy    : {drug_acc:.4f}")
-            print(f"  Dose Accuracy    : {dose_acc:.4f}")
-            print(f"  Date Accuracy    : {date_acc:.4f}")
-
-            # --- Structured JSON F1 via LLM ---
-            struct_result = evaluate_structured_json_f1(ocr_text, gt["structured"])
-            struct_f1 = struct_result.get("med_f1", 0.0)
-            if isinstance(struct_f1, (int, float)):
-                pass
-            else:
-                struct_f1 = 0.0
-
-            print(f"  Structured F1    : {struct_f1:.4f}")
-            if struct_result.get("field_level_notes"):
-                print(f"  Notes            : {struct_result['field_level_notes'][:120]}")
-
-            result = PrescriptionResult(
-                name=tag,
-                engine=engine,
-                cer=cer,
-                wer=wer,
-                layout_score=layout,
-                medication_recall=med_recall,
-                numeric_dosage_acc=num_dose,
-                drug_acc=drug_acc,
-                dose_acc=dose_acc,
-                date_acc=date_acc,
-                structured_f1=struct_f1,
-                structured_detail=struct_result,
-                ocr_text=ocr_text[:500],
-            )
-            all_results.append(result)
+    divider(f"ENGINES: {', '.join(e.upper() for e in engines)}")
+    all_results: List[PrescriptionResult] = asyncio.run(_evaluate_engines(engines))
 
     # ── Summary ─────────────────────────────────────────────
     divider("SUMMARY COMPARISON")
@@ -563,23 +1012,28 @@ def run_evaluation(engines: Optional[List[str]] = None):
             continue
 
         n = len(engine_results)
-        avg = lambda attr: sum(getattr(r, attr) for r in engine_results) / n
-
-        print(f"\n  {BOLD}{engine.upper()}{RESET}  ({n} prescriptions)")
-        print(f"    Avg CER              : {avg('cer'):.4f}")
-        print(f"    Avg WER              : {avg('wer'):.4f}")
-        print(f"    Avg Layout Score     : {avg('layout_score'):.4f}")
-        print(f"    Avg Medication Recall: {avg('medication_recall'):.4f}")
-        print(f"    Avg Numeric Dosage   : {avg('numeric_dosage_acc'):.4f}")
-        print(f"    Avg Drug Accuracy    : {avg('drug_acc'):.4f}")
-        print(f"    Avg Dose Accuracy    : {avg('dose_acc'):.4f}")
-        print(f"    Avg Date Accuracy    : {avg('date_acc'):.4f}")
-        print(f"    Avg Structured F1    : {avg('structured_f1'):.4f}")
+        # One (n, metrics) matrix, reduced column-wise in one call
+        M = np.fromiter(
+            (getattr(r, attr) for r in engine_results for attr in SUMMARY_METRICS),
+            dtype=np.float64, count=n * len(SUMMARY_METRICS),
+        ).reshape(n, len(SUMMARY_METRICS))
+        means = dict(zip(SUMMARY_METRICS, M.mean(axis=0)))
+
+        # Corpus-level (micro) rate: total edits / total reference length,
+        # i.e. each sample's rate weighted by its reference length
+        ref_chars = np.array([GROUND_TRUTH[r.name]["_norm"]["ref_chars"] for r in engine_results])
+        ref_words = np.array([GROUND_TRUTH[r.name]["_norm"]["ref_words"] for r in engine_results])
+        corpus_cer = M[:, 0] @ ref_chars / max(ref_chars.sum(), 1)
+        corpus_wer = M[:, 1] @ ref_words / max(ref_words.sum(), 1)
+
+        sys.stdout.write(SUMMARY_TEMPLATE.format(
+            engine=engine.upper(), n=n, corpus_cer=corpus_cer, corpus_wer=corpus_wer, **means
+        ))
 
     # ── Save detailed JSON report ───────────────────────────
     report_path = TESTS_DIR / "ocr_evaluation_report.json"
-    with open(report_path, "w", encoding="utf-8") as f:
-        json.dump([asdict(r) for r in all_results], f, indent=2, ensure_ascii=False)
+    # orjson serializes the dataclasses directly (no asdict() copy), UTF-8
+    report_path.write_bytes(orjson.dumps(all_results, option=orjson.OPT_INDENT_2))
     print(f"\n  Detailed report saved to: {report_path}")
 
     return all_results
@@ -599,8 +1053,23 @@ if __name__ == "__main__":
         default="both",
         help="Which OCR engine(s) to evaluate (default: both)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-run the structured-JSON LLM evaluations instead of reading cached results",
+    )
+    parser.add_argument(
+        "--refresh-ocr",
+        action="store_true",
+        help="Re-run OCR instead of reading cached OCR output",
+    )
     args = parser.parse_args()
 
+    if args.no_cache:
+        EVAL_CACHE_READ = False
+    if args.refresh_ocr:
+        OCR_REFRESH = True
+
     if args.engine == "both":
         engines = ["glm", "lighton"]
     else:
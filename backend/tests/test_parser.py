@@ -1,3 +1,6 @@
+from dotenv import load_dotenv
+load_dotenv()
+
 from modules.prescription_parser import parse_prescription
 from modules.ocr import extract_text_from_image
 
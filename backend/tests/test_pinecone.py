@@ -8,8 +8,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+
 from dotenv import load_dotenv
-load_dotenv()
 
 PASS = "\033[92m✓ PASS\033[0m"
 FAIL = "\033[91m✗ FAIL\033[0m"
@@ -21,111 +23,156 @@ def divider(title):
     print(f"{'='*60}")
 
 
-# ── 1. Pinecone Connection ──────────────────────────────────
-divider("1. Pinecone Connection")
-
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = "medi"
 
-if not PINECONE_API_KEY:
-    print(f"  {FAIL}  PINECONE_API_KEY not found in .env")
-    sys.exit(1)
+TEST_QUERIES = ["What is diabetes?"]
 
-print(f"  API Key              : {'*' * 6}...{PINECONE_API_KEY[-4:]}")
 
-try:
+# Client, index handle and stats are created on first use and reused:
+# importing this module (e.g. to reuse the helpers) makes no network calls
+@cache
+def pinecone_client():
     from pinecone import Pinecone
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    print(f"  Connection           : {PASS}")
-except Exception as e:
-    print(f"  {FAIL}  Pinecone connection failed: {e}")
-    sys.exit(1)
-
-
-# ── 2. List Indexes ─────────────────────────────────────────
-divider("2. Pinecone Indexes")
-
-try:
-    indexes = pc.list_indexes()
-    index_names = [i["name"] for i in indexes]
-    print(f"  Available indexes    : {index_names}")
-
-    if INDEX_NAME in index_names:
-        print(f"  Index '{INDEX_NAME}'       : {PASS}  Found")
-    else:
-        print(f"  {FAIL}  Index '{INDEX_NAME}' NOT found!")
-        print(f"  Available: {index_names}")
-        sys.exit(1)
+    return Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 
-except Exception as e:
-    print(f"  {FAIL}  Failed to list indexes: {e}")
-    sys.exit(1)
 
+@cache
+def medi_index():
+    return pinecone_client().Index(INDEX_NAME)
 
-# ── 3. Index Stats ──────────────────────────────────────────
-divider("3. Index Statistics")
 
-try:
-    index = pc.Index(INDEX_NAME)
-    stats = index.describe_index_stats()
+@cache
+def index_stats():
+    return medi_index().describe_index_stats()
 
-    total_vectors = stats.get("total_vector_count", 0)
-    namespaces = stats.get("namespaces", {})
 
-    print(f"  Total vectors        : {total_vectors}")
-    print(f"  Dimension            : {stats.get('dimension', 'N/A')}")
-    print(f"  Namespaces           : {list(namespaces.keys()) if namespaces else 'None'}")
+def get_query_embeddings(queries):
+    """Embed all queries in one batched encode() with the app's shared model."""
+    # Loaded once per process (fp16 on CUDA), same model variant as ingestion
+    from modules.embeddings import get_embedding_model
 
-    if namespaces:
-        for ns, ns_stats in namespaces.items():
-            count = ns_stats.get("vector_count", 0)
-            print(f"    '{ns}' : {count} vectors")
-    
-    if total_vectors > 0:
-        print(f"  Data present         : {PASS}")
-    else:
-        print(f"  {WARN}  Index is EMPTY — upload PDFs first")
+    return get_embedding_model().encode(
+        queries,
+        batch_size=64,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
 
-except Exception as e:
-    print(f"  {FAIL}  Failed to get index stats: {e}")
 
+def main():
+    load_dotenv()
 
-# ── 4. Test Query ────────────────────────────────────────────
-divider("4. Test Vector Query")
+    # ── 1. Pinecone Connection ──────────────────────────────────
+    divider("1. Pinecone Connection")
 
-try:
-    import torch
-    from sentence_transformers import SentenceTransformer
+    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2", device=device)
+    if not PINECONE_API_KEY:
+        print(f"  {FAIL}  PINECONE_API_KEY not found in .env")
+        sys.exit(1)
 
-    test_query = "What is diabetes?"
-    query_embedding = model.encode(test_query, convert_to_numpy=True, normalize_embeddings=True)
+    print(f"  API Key              : {'*' * 6}...{PINECONE_API_KEY[-4:]}")
 
-    # Try querying each namespace
-    for ns in list(namespaces.keys()) if namespaces else ["default"]:
-        results = index.query(
-            vector=query_embedding.tolist(),
-            top_k=3,
-            namespace=ns,
-            include_metadata=True
-        )
+    try:
+        pinecone_client()
+        print(f"  Connection           : {PASS}")
+    except Exception as e:
+        print(f"  {FAIL}  Pinecone connection failed: {e}")
+        sys.exit(1)
+
+    # ── 2. List Indexes ─────────────────────────────────────────
+    divider("2. Pinecone Indexes")
 
-        matches = results.get("matches", [])
-        print(f"\n  Namespace '{ns}':")
-        print(f"    Matches found      : {len(matches)}")
+    try:
+        indexes = pinecone_client().list_indexes()
+        index_names = [i["name"] for i in indexes]
+        print(f"  Available indexes    : {index_names}")
 
-        if matches:
-            for i, match in enumerate(matches[:3]):
-                score = match.get("score", 0)
-                text = match.get("metadata", {}).get("text", "N/A")[:80]
-                print(f"    [{i+1}] score={score:.4f}  text=\"{text}...\"")
-            print(f"    Query test         : {PASS}")
+        if INDEX_NAME in index_names:
+            print(f"  Index '{INDEX_NAME}'       : {PASS}  Found")
         else:
-            print(f"    {WARN}  No matches found for test query")
+            print(f"  {FAIL}  Index '{INDEX_NAME}' NOT found!")
+            print(f"  Available: {index_names}")
+            sys.exit(1)
 
-except Exception as e:
-    print(f"  {FAIL}  Query test failed: {e}")
+    except Exception as e:
+        print(f"  {FAIL}  Failed to list indexes: {e}")
+        sys.exit(1)
 
-print()
+    # ── 3. Index Stats ──────────────────────────────────────────
+    divider("3. Index Statistics")
+
+    namespaces = {}
+    try:
+        stats = index_stats()
+
+        total_vectors = stats.get("total_vector_count", 0)
+        namespaces = stats.get("namespaces", {})
+
+        print(f"  Total vectors        : {total_vectors}")
+        print(f"  Dimension            : {stats.get('dimension', 'N/A')}")
+        print(f"  Namespaces           : {list(namespaces.keys()) if namespaces else 'None'}")
+
+        if namespaces:
+            for ns, ns_stats in namespaces.items():
+                count = ns_stats.get("vector_count", 0)
+                print(f"    '{ns}' : {count} vectors")
+
+        if total_vectors > 0:
+            print(f"  Data present         : {PASS}")
+        else:
+            print(f"  {WARN}  Index is EMPTY — upload PDFs first")
+
+    except Exception as e:
+        print(f"  {FAIL}  Failed to get index stats: {e}")
+
+    # ── 4. Test Query ────────────────────────────────────────────
+    divider("4. Test Vector Query")
+
+    try:
+        query_embeddings = get_query_embeddings(TEST_QUERIES)
+
+        # Every (namespace, test query) pair, queried concurrently: one
+        # round trip of wall time instead of one per namespace
+        vectors = [embedding.tolist() for embedding in query_embeddings]
+        jobs = [
+            (ns, test_query, vector)
+            for ns in (list(namespaces.keys()) if namespaces else ["default"])
+            for test_query, vector in zip(TEST_QUERIES, vectors)
+        ]
+
+        def run_query(job):
+            ns, _, vector = job
+            return medi_index().query(
+                vector=vector,
+                top_k=3,
+                namespace=ns,
+                include_metadata=True
+            )
+
+        with ThreadPoolExecutor(max_workers=min(len(jobs), 8)) as pool:
+            all_results = list(pool.map(run_query, jobs))
+
+        for (ns, test_query, _), results in zip(jobs, all_results):
+            matches = results.get("matches", [])
+            print(f"\n  Namespace '{ns}' — \"{test_query}\":")
+            print(f"    Matches found      : {len(matches)}")
+
+            if matches:
+                for i, match in enumerate(matches[:3]):
+                    score = match.get("score", 0)
+                    text = match.get("metadata", {}).get("text", "N/A")[:80]
+                    print(f"    [{i+1}] score={score:.4f}  text=\"{text}...\"")
+                print(f"    Query test         : {PASS}")
+            else:
+                print(f"    {WARN}  No matches found for test query")
+
+    except Exception as e:
+        print(f"  {FAIL}  Query test failed: {e}")
+
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,13 @@ PREREQUISITE: Start the backend first:
 Run: python tests/test_prescription_pipeline.py
 """
 
+import io
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
 
 PASS = "\033[92m✓ PASS\033[0m"
 FAIL = "\033[91m✗ FAIL\033[0m"
@@ -22,6 +26,11 @@ BASE_URL = "http://localhost:8000"
 TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_IMAGE = os.path.join(TESTS_DIR, "original.jpg")
 
+# One keep-alive session for every request below: the TCP connection to the
+# backend is opened once instead of per call
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(pool_maxsize=16))
+
 
 def divider(title):
     print(f"\n{'='*60}")
@@ -33,7 +42,7 @@ def divider(title):
 divider("1. Server Health Check")
 
 try:
-    resp = requests.get(f"{BASE_URL}/docs", timeout=5)
+    resp = http_session.get(f"{BASE_URL}/docs", timeout=5)
     if resp.status_code == 200:
         print(f"  Server status        : {PASS}  Running at {BASE_URL}")
     else:
@@ -49,7 +58,7 @@ except requests.ConnectionError:
 divider("2. Verify Prescription Endpoints Exist")
 
 try:
-    resp = requests.get(f"{BASE_URL}/openapi.json", timeout=5)
+    resp = http_session.get(f"{BASE_URL}/openapi.json", timeout=5)
     if resp.status_code == 200:
         paths = list(resp.json().get("paths", {}).keys())
         has_upload = "/upload_prescription/" in paths
@@ -84,7 +93,7 @@ try:
         sys.exit(0)
 
     with open(TEST_IMAGE, "rb") as f:
-        resp = requests.post(
+        resp = http_session.post(
             f"{BASE_URL}/upload_prescription/",
             files={"file": ("original.jpg", f, "image/jpeg")},
             timeout=300  # OCR + parsing can be slow
@@ -135,36 +144,47 @@ else:
         "Are there any follow-up instructions?",
     ]
 
-    for q in test_questions:
-        try:
-            resp = requests.post(
+    # The questions are independent: ask them all at once (each one waits
+    # on the LLM) and print the answers as they arrive
+    with ThreadPoolExecutor(max_workers=len(test_questions)) as pool:
+        futures = {
+            pool.submit(
+                http_session.post,
                 f"{BASE_URL}/ask_prescription/",
                 data={
                     "session_id": session_id,
                     "question": q
                 },
                 timeout=60
-            )
+            ): q
+            for q in test_questions
+        }
+
+        for future in as_completed(futures):
+            q = futures[future]
+            try:
+                resp = future.result()
 
-            print(f"\n  Q: {q}")
-            print(f"  Status: {resp.status_code}")
+                print(f"\n  Q: {q}")
+                print(f"  Status: {resp.status_code}")
 
-            if resp.status_code == 200:
-                answer = resp.json().get("answer", "N/A")
-                print(f"  A: {str(answer)[:200]}...")
-                print(f"  {PASS}")
-            else:
-                print(f"  {FAIL}  Got {resp.status_code}: {resp.text[:200]}")
+                if resp.status_code == 200:
+                    answer = resp.json().get("answer", "N/A")
+                    print(f"  A: {str(answer)[:200]}...")
+                    print(f"  {PASS}")
+                else:
+                    print(f"  {FAIL}  Got {resp.status_code}: {resp.text[:200]}")
 
-        except Exception as e:
-            print(f"  {FAIL}  Ask failed: {e}")
+            except Exception as e:
+                print(f"\n  Q: {q}")
+                print(f"  {FAIL}  Ask failed: {e}")
 
 
 # ── 5. Test invalid session_id ──────────────────────────────
 divider("5. Test Invalid Session ID")
 
 try:
-    resp = requests.post(
+    resp = http_session.post(
         f"{BASE_URL}/ask_prescription/",
         data={
             "session_id": "invalid-uuid-12345",
@@ -187,19 +207,13 @@ except Exception as e:
 divider("6. Test Non-Image Upload")
 
 try:
-    # Try uploading a text file as a prescription
-    import tempfile
-
-    with tempfile.NamedTemporaryFile(suffix=".txt", delete=False, mode="w") as tmp:
-        tmp.write("This is not an image")
-        tmp_path = tmp.name
-
-    with open(tmp_path, "rb") as f:
-        resp = requests.post(
-            f"{BASE_URL}/upload_prescription/",
-            files={"file": ("test.txt", f, "text/plain")},
-            timeout=30
-        )
+    # Try uploading a text file as a prescription (from memory: nothing
+    # to write to disk or clean up)
+    resp = http_session.post(
+        f"{BASE_URL}/upload_prescription/",
+        files={"file": ("test.txt", io.BytesIO(b"This is not an image"), "text/plain")},
+        timeout=30
+    )
 
     print(f"  Status code          : {resp.status_code}")
 
@@ -210,8 +224,6 @@ try:
     else:
         print(f"  Status               : {resp.status_code}")
 
-    os.unlink(tmp_path)
-
 except Exception as e:
     print(f"  {FAIL}  Non-image test failed: {e}")
 